@@ -0,0 +1,929 @@
+# Benchmarks for the hash map implementations.
+#
+# Run every benchmark:      python benchmark.py
+# Run selected benchmarks:  python benchmark.py probe
+
+
+import gc
+import itertools
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from include import (SeededHash, hash_function_1, hash_function_2, hash_function_fold64,
+                     hash_function_builtin, hash_function_int, next_power_of_two, next_prime)
+import concurrent_hash_map
+import frequency
+import hash_map_cuckoo
+import hash_map_oa
+import hash_map_sc
+import hash_map_soa
+import shared_hash_map
+import sharded_hash_map
+
+
+def _time(fn, *args) -> float:
+    """Return wall clock seconds taken by fn(*args)."""
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def _legacy_oa_get(m: hash_map_oa.HashMap, key: str) -> object:
+    """OA lookup as it was before hashes were cached: the key is rehashed on every probe step."""
+    index = m._hash_function(key) % m._capacity
+    i = 0
+    while True:
+        entry = m._buckets.get_at_index(index)
+        if entry:
+            if entry.key == key:
+                return None if entry.is_tombstone else entry.value
+            i = i + 1
+            index = (m._hash_function(key) + i * i) % m._capacity
+        else:
+            return None
+
+
+def _oa_probe_length(m: hash_map_oa.HashMap, key: str) -> int:
+    """Return number of slots examined by an OA lookup of key."""
+    return m._find_counted(key, m._hash_function(key))[1]
+
+
+def bench_probe(capacity: int = 20011) -> None:
+    """Probes/sec of OA lookups with and without the cached hash at load factors 0.1 to 0.5."""
+    print("\nOA probe throughput (hits + misses)")
+    print(f"{'function':<16}{'load':>6}{'probes':>10}{'legacy p/s':>14}{'cached p/s':>14}{'speedup':>9}")
+    for function in (hash_function_1, hash_function_2):
+        for load in (0.1, 0.2, 0.3, 0.4, 0.5):
+            m = hash_map_oa.HashMap(capacity, function)
+            count = int(load * m.get_capacity())
+            for i in range(count):
+                m.put('key' + str(i), i)
+            lookups = ['key' + str(i) for i in range(count)] + ['miss' + str(i) for i in range(count)]
+            probes = sum(_oa_probe_length(m, key) for key in lookups)
+
+            legacy = _time(lambda: [_legacy_oa_get(m, key) for key in lookups])
+            cached = _time(lambda: [m.get(key) for key in lookups])
+            print(f"{function.__name__:<16}{load:>6}{probes:>10}{probes / legacy:>14.0f}{probes / cached:>14.0f}"
+                  f"{legacy / cached:>8.2f}x")
+
+
+def _legacy_resize(m, new_capacity: int):
+    """Resize as it was done before the rehash engine: every pair is put into a fresh table."""
+    fresh = type(m)(new_capacity, m._hash_function)
+    pairs = m.get_keys_and_values()
+    for i in range(pairs.length()):
+        key, value = pairs.get_at_index(i)
+        fresh.put(key, value)
+    return fresh
+
+
+def bench_resize(sizes: tuple = (1000, 10000, 100000)) -> None:
+    """Time of a single doubling resize_table against entry count, for put-based and bulk rehash."""
+    print("\nresize_table time (seconds) for one doubling")
+    print(f"{'map':<6}{'entries':>10}{'put-based':>12}{'rehash':>10}{'speedup':>9}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for size in sizes:
+            m = module.HashMap(size * 4, hash_function_2)
+            for i in range(size):
+                m.put('key' + str(i), i)
+            capacity = 2 * m.get_capacity()
+
+            legacy = _time(_legacy_resize, m, capacity)
+            rehash = _time(m.resize_table, capacity)
+            print(f"{name:<6}{size:>10}{legacy:>12.3f}{rehash:>10.3f}{legacy / rehash:>8.2f}x")
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    """Return the given fraction percentile of an already sorted list."""
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def bench_latency(count: int = 50000, step: int = 8) -> None:
+    """Per-put latency histogram for stop-the-world resize_table against incremental resizing."""
+    print(f"\nput latency (microseconds) over {count} inserts, incremental step {step}")
+    edges = (1, 10, 100, 1000, 10000, 100000)
+    print(f"{'map':<6}{'mode':<12}{'p50':>8}{'p99':>8}{'p999':>9}{'max':>10}   "
+          + ''.join(f"{'<' + str(edge):>8}" for edge in edges) + f"{'>=' + str(edges[-1]):>9}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for mode, incremental in (('stop-world', 0), ('incremental', step)):
+            m = module.HashMap(11, hash_function_2, incremental_resize=incremental)
+            samples = []
+            for i in range(count):
+                key = 'key' + str(i)
+                start = time.perf_counter_ns()
+                m.put(key, i)
+                samples.append((time.perf_counter_ns() - start) / 1000)
+            samples.sort()
+
+            histogram = [0] * (len(edges) + 1)
+            for sample in samples:
+                histogram[sum(1 for edge in edges if sample >= edge)] += 1
+            print(f"{name:<6}{mode:<12}{_percentile(samples, 0.5):>8.1f}{_percentile(samples, 0.99):>8.1f}"
+                  f"{_percentile(samples, 0.999):>9.1f}{samples[-1]:>10.1f}   " + ''.join(f"{n:>8}" for n in histogram))
+
+
+def _key_sets(count: int) -> dict:
+    """Return realistic key sets of the given size, by name."""
+    rng = random.Random(42)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    return {
+        'sequential': ['str' + str(i) for i in range(count)],
+        'random': [''.join(rng.choice(alphabet) for _ in range(rng.randint(5, 16))) for _ in range(count)],
+        'urls': ['/api/v1/users/' + str(rng.randrange(10 ** 6)) + '/orders/' + str(i) for i in range(count)],
+        'integers': [rng.randrange(2 ** 40) & ~0xFF for _ in range(count)],
+    }
+
+
+def bench_hash(count: int = 20000) -> None:
+    """Chain length (SC), probe length (OA) and put+get ops/sec for each hash function on several key sets."""
+    functions = (hash_function_1, hash_function_2, hash_function_fold64, hash_function_builtin, hash_function_int)
+    print(f"\nhash function quality and speed over {count} keys")
+    print(f"{'keys':<12}{'function':<23}{'SC max chain':>13}{'SC mean':>9}{'OA mean probe':>14}{'OA max':>8}"
+          f"{'SC ops/s':>11}{'OA ops/s':>11}")
+    for name, keys in _key_sets(count).items():
+        for function in functions:
+            # Built-in hash() takes any key, the integer mixer only integers and the rest only strings.
+            if function is not hash_function_builtin and isinstance(keys[0], int) != (function is hash_function_int):
+                continue
+
+            sc = hash_map_sc.HashMap(11, function)
+            oa = hash_map_oa.HashMap(11, function)
+            sc_time = _time(lambda: ([sc.put(key, 1) for key in keys], [sc.get(key) for key in keys]))
+            oa_time = _time(lambda: ([oa.put(key, 1) for key in keys], [oa.get(key) for key in keys]))
+
+            chains = [sc._buckets.get_at_index(i).length() for i in range(sc.get_capacity())]
+            chains = [length for length in chains if length]
+            probes = [_oa_probe_length(oa, key) for key in keys]
+            print(f"{name:<12}{function.__name__:<23}{max(chains):>13}{sum(chains) / len(chains):>9.2f}"
+                  f"{sum(probes) / len(probes):>14.2f}{max(probes):>8}"
+                  f"{2 * count / sc_time:>11.0f}{2 * count / oa_time:>11.0f}")
+
+
+def bench_memory(sizes: tuple = (10000, 100000, 1000000)) -> None:
+    """Bytes per entry allocated by each map type, measured with tracemalloc.  Keys and values are built beforehand."""
+    print("\nmemory per entry (bytes), keys and values excluded")
+    print(f"{'map':<6}{'entries':>10}{'bytes':>14}{'bytes/entry':>13}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for size in sizes:
+            keys = ['key' + str(i) for i in range(size)]
+            tracemalloc.start()
+            m = module.HashMap(11, hash_function_builtin)
+            for i in range(size):
+                m.put(keys[i], keys[i])
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print(f"{name:<6}{size:>10}{current:>14}{current / size:>13.1f}")
+            del m
+
+
+def bench_soa(count: int = 200000) -> None:
+    """Throughput and memory of the struct-of-arrays OA map against the entry-object OA map."""
+    keys = ['key' + str(i) for i in range(count)]
+    misses = ['miss' + str(i) for i in range(count)]
+    print(f"\nOA entry objects vs struct-of-arrays over {count} keys (built-in hash)")
+    print(f"{'map':<6}{'put/s':>11}{'hit/s':>11}{'miss/s':>11}{'remove/s':>11}{'bytes/entry':>13}")
+    for module in (hash_map_oa, hash_map_soa):
+        tracemalloc.start()
+        m = module.HashMap(11, hash_function_builtin)
+        put = _time(lambda: [m.put(key, key) for key in keys])
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        hit = _time(lambda: [m.get(key) for key in keys])
+        miss = _time(lambda: [m.get(key) for key in misses])
+        remove = _time(lambda: [m.remove(key) for key in keys])
+        name = module.__name__[-3:].upper().lstrip('_')
+        print(f"{name:<6}{count / put:>11.0f}{count / hit:>11.0f}{count / miss:>11.0f}{count / remove:>11.0f}"
+              f"{memory / count:>13.1f}")
+
+
+def bench_batch(count: int = 100000) -> None:
+    """Batched put_many/get_many/contains_many/remove_many against looping over the single-key calls."""
+    pairs = [('key' + str(i), i) for i in range(count)]
+    keys = [key for key, _ in pairs]
+    print(f"\nbatch vs single calls over {count} keys (built-in hash), seconds")
+    print(f"{'map':<6}{'operation':<10}{'loop':>9}{'batch':>9}{'speedup':>9}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        single, batch = module.HashMap(11, hash_function_builtin), module.HashMap(11, hash_function_builtin)
+        timings = (
+            ('put', _time(lambda: [single.put(key, value) for key, value in pairs]), _time(batch.put_many, pairs)),
+            ('get', _time(lambda: [single.get(key) for key in keys]), _time(batch.get_many, keys)),
+            ('contains', _time(lambda: [single.contains_key(key) for key in keys]), _time(batch.contains_many, keys)),
+            ('remove', _time(lambda: [single.remove(key) for key in keys]), _time(batch.remove_many, keys)),
+        )
+        for operation, loop, batched in timings:
+            print(f"{name:<6}{operation:<10}{loop:>9.3f}{batched:>9.3f}{loop / batched:>8.2f}x")
+
+
+def _legacy_sc_get(m: hash_map_sc.HashMap, key: str) -> object:
+    """SC lookup as it was before single-traversal lookups: the chain is walked once to test for key and again to read it."""
+    bucket = m._buckets.get_at_index(m._hash_function(key) % m._capacity)
+    if bucket.contains(key):
+        return bucket.contains(key).value
+    return None
+
+
+def _legacy_sc_remove(m: hash_map_sc.HashMap, key: str) -> None:
+    """SC remove as it was before single-traversal lookups: contains walks the chain, then LinkedList.remove walks it again."""
+    bucket = m._buckets.get_at_index(m._hash_function(key) % m._capacity)
+    if bucket.contains(key):
+        bucket.remove(key)
+        m._size -= 1
+
+
+def _sc_at_load(keys: list, load: float) -> hash_map_sc.HashMap:
+    """Return an SC map holding keys whose table is rebuilt to the given load factor, past the 1.0 put would allow."""
+    m = hash_map_sc.HashMap(11, hash_function_builtin)
+    m.put_many((key, key) for key in keys)
+    m._rehash(max(1, int(len(keys) / load)))
+    return m
+
+
+def bench_lookup(count: int = 100000) -> None:
+    """SC get/remove/get_or_default ops/sec with one chain walk against the old two-walk versions at load factors 0.5 to 4.0."""
+    keys = ['key' + str(i) for i in range(count)]
+    misses = ['miss' + str(i) for i in range(count)]
+    print(f"\nSC single vs double chain walk over {count} keys (built-in hash), ops/sec")
+    print(f"{'load':>6} {'operation':<17}{'two walks':>12}{'one walk':>12}{'speedup':>9}")
+    for load in (0.5, 1.0, 4.0):
+        m = _sc_at_load(keys, load)
+        timings = [
+            ('get hit', _time(lambda: [_legacy_sc_get(m, key) for key in keys]), _time(lambda: [m.get(key) for key in keys])),
+            ('get miss', _time(lambda: [_legacy_sc_get(m, key) for key in misses]),
+             _time(lambda: [m.get(key) for key in misses])),
+            ('contains+get', _time(lambda: [m.get(key) if m.contains_key(key) else 0 for key in keys + misses]),
+             _time(lambda: [m.get_or_default(key, 0) for key in keys + misses])),
+        ]
+        legacy, single = _sc_at_load(keys, load), _sc_at_load(keys, load)
+        timings.append(('remove', _time(lambda: [_legacy_sc_remove(legacy, key) for key in keys]),
+                        _time(lambda: [single.remove(key) for key in keys])))
+        for operation, two, one in timings:
+            calls = 2 * count if operation == 'contains+get' else count
+            print(f"{load:>6} {operation:<17}{calls / two:>12.0f}{calls / one:>12.0f}{two / one:>8.2f}x")
+
+
+def _legacy_find_mode(da) -> tuple:
+    """find_mode as it was before increment: contains_key, get and put for every element."""
+    map = hash_map_sc.HashMap()
+    for i in range(da.length()):
+        key = da.get_at_index(i)
+        if map.contains_key(key):
+            map.put(key, map.get(key) + 1)
+        else:
+            map.put(key, 1)
+    pairs = map.get_keys_and_values()
+    frequency = max(pairs.get_at_index(i)[1] for i in range(pairs.length()))
+    return [pairs.get_at_index(i)[0] for i in range(pairs.length()) if pairs.get_at_index(i)[1] == frequency], frequency
+
+
+def bench_count(count: int = 10 ** 7, distinct: int = 10 ** 5) -> None:
+    """Counting count words drawn from distinct ones: contains_key/get/put against increment, and find_mode before and after."""
+    rng = random.Random(42)
+    words = ['word' + str(i) for i in range(distinct)]
+    items = [words[int(rng.paretovariate(1.2)) % distinct] for _ in range(count)]
+    print(f"\ncounting {count} items over {distinct} distinct words (built-in hash), seconds")
+    print(f"{'map':<10}{'contains/get/put':>18}{'increment':>11}{'speedup':>9}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        legacy, counts = module.HashMap(11, hash_function_builtin), module.HashMap(11, hash_function_builtin)
+
+        def count_legacy():
+            for key in items:
+                if legacy.contains_key(key):
+                    legacy.put(key, legacy.get(key) + 1)
+                else:
+                    legacy.put(key, 1)
+
+        def count_increment():
+            for key in items:
+                counts.increment(key)
+
+        before, after = _time(count_legacy), _time(count_increment)
+        print(f"{name:<10}{before:>18.2f}{after:>11.2f}{before / after:>8.2f}x")
+
+    da = hash_map_sc.DynamicArray(items)
+    before, after = _time(_legacy_find_mode, da), _time(hash_map_sc.find_mode, da)
+    print(f"{'find_mode':<10}{before:>18.2f}{after:>11.2f}{before / after:>8.2f}x")
+
+
+def bench_stream(count: int = 10 ** 6, distinct: int = 10 ** 5, counters: int = 1000) -> None:
+    """Mode and top-10 from a generator: find_mode on a materialized array, FrequencyCounter and bounded SpaceSaving."""
+    rng = random.Random(7)
+    words = ['word' + str(i) for i in range(distinct)]
+
+    def stream():
+        for _ in range(count):
+            yield words[int(rng.paretovariate(1.1)) % distinct]
+
+    print(f"\nstreaming mode / top-10 over {count} items from {distinct} words, SpaceSaving with {counters} counters")
+    print(f"{'engine':<18}{'seconds':>9}{'peak MB':>9}{'mode':>10}{'frequency':>10}{'top-10 hits':>12}")
+    def run(name: str) -> tuple:
+        rng.seed(7)
+        if name == 'find_mode':
+            return hash_map_sc.find_mode(hash_map_sc.DynamicArray(list(stream()))) + (None,)
+        counter = frequency.FrequencyCounter(stream()) if name == 'FrequencyCounter' else frequency.SpaceSaving(counters, stream())
+        return counter.mode() + (counter.top_k(10),)
+
+    # Time each engine on its own, then run it again under tracemalloc, which slows allocation down too much to time with.
+    exact = None
+    for name in ('find_mode', 'FrequencyCounter', 'SpaceSaving'):
+        start = time.perf_counter()
+        mode, count_, top = run(name)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        run(name)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        if top is not None and exact is None:
+            exact = [top[i][0] for i in range(top.length())]
+        hits = '-' if top is None else sum(1 for i in range(top.length()) if top[i][0] in exact)
+        print(f"{name:<18}{elapsed:>9.2f}{peak / 2 ** 20:>9.1f}{mode[0]:>10}{count_:>10}{hits:>12}")
+
+
+def _drain(iterator) -> None:
+    """Consume an iterator without keeping what it yields."""
+    for _ in iterator:
+        pass
+
+
+def bench_views(sizes: tuple = (100000, 1000000)) -> None:
+    """Peak extra memory, time to first item and full scan time of items() against get_keys_and_values()."""
+    print("\nexport via get_keys_and_values() vs lazy items(), built-in hash")
+    print(f"{'map':<6}{'entries':>10}{' method':<22}{'first item s':>13}{'full scan s':>12}{'peak MB':>9}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for size in sizes:
+            m = module.HashMap(11, hash_function_builtin)
+            m.put_many(('key' + str(i), i) for i in range(size))
+            for method, first, scan in (
+                    (' get_keys_and_values', lambda: m.get_keys_and_values().get_at_index(0),
+                     lambda: m.get_keys_and_values()),
+                    (' items', lambda: next(m.items()), lambda: _drain(m.items()))):
+                tracemalloc.start()
+                scan()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{name:<6}{size:>10}{method:<22}{_time(first):>13.5f}{_time(scan):>12.3f}{peak / 2 ** 20:>9.1f}")
+
+
+class _LegacyOAIterator:
+    """OA iteration as it was before HashMapIterator: cursor kept on one object, every non-empty slot yielded."""
+
+    def __init__(self, m: hash_map_oa.HashMap) -> None:
+        self._buckets = m._buckets
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._index < self._buckets.length():
+            if self._buckets[self._index] is not None:
+                self._index += 1
+                return self._buckets[self._index - 1]
+            self._index += 1
+        raise StopIteration
+
+
+def bench_scan(count: int = 200000) -> None:
+    """Full-scan entries/sec of each map's iterator, the lazy items() generator and get_keys_and_values()."""
+    print(f"\nfull scan over {count} entries with a third of them removed, built-in hash, entries/sec")
+    print(f"{'map':<6}{'method':<22}{'yielded':>9}{'entries/s':>12}")
+    for module in (hash_map_sc, hash_map_oa, hash_map_soa):
+        name = module.__name__[-3:].upper().lstrip('_')
+        m = module.HashMap(11, hash_function_builtin)
+        for i in range(count):
+            m.put('key' + str(i), i)
+        for i in range(0, count, 3):
+            m.remove('key' + str(i))
+
+        methods = [('iter', lambda: iter(m))]
+        if module is hash_map_oa:
+            methods.insert(0, ('legacy iter', lambda: _LegacyOAIterator(m)))
+        if module is not hash_map_soa:
+            methods.append(('items', m.items))
+        methods.append(('get_keys_and_values', lambda: iter(m.get_keys_and_values()._data)))
+        for method, make in methods:
+            yielded = sum(1 for _ in make())
+            elapsed = _time(lambda: _drain(make()))
+            print(f"{name:<6}{method:<22}{yielded:>9}{yielded / elapsed:>12.0f}")
+
+
+class _LockedHashMap:
+    """SC HashMap shared the simple way: every call goes through one global lock."""
+
+    def __init__(self) -> None:
+        self._map = hash_map_sc.HashMap(11, hash_function_builtin)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> object:
+        with self._lock:
+            return self._map.get(key)
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._map.put(key, value)
+
+
+def bench_concurrent(thread_counts: tuple = (1, 2, 4, 8), ops: int = 400000, keys: int = 20000) -> None:
+    """Throughput of a 90% get / 10% put mix as threads are added: one global lock against ConcurrentHashMap's stripes."""
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"\nconcurrent 90% get / 10% put, {ops} ops split over threads, {keys} keys, GIL {'on' if gil else 'off'}, ops/sec")
+    print(f"{'threads':>8}{'global lock':>14}{'striped':>14}{'speedup':>9}")
+    names = ['key' + str(i) for i in range(keys)]
+    for threads in thread_counts:
+        results = []
+        for make in (_LockedHashMap, lambda: concurrent_hash_map.ConcurrentHashMap(11, hash_function_builtin)):
+            m = make()
+            for name in names:
+                m.put(name, 0)
+
+            def work(seed: int) -> None:
+                rng = random.Random(seed)
+                for _ in range(ops // threads):
+                    key = names[rng.randrange(keys)]
+                    if rng.random() < 0.1:
+                        m.put(key, seed)
+                    else:
+                        m.get(key)
+
+            workers = [threading.Thread(target=work, args=(seed,)) for seed in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            results.append(ops / (time.perf_counter() - start))
+        print(f"{threads:>8}{results[0]:>14.0f}{results[1]:>14.0f}{results[1] / results[0]:>8.2f}x")
+
+
+def bench_sharded(count: int = 200000, shard_counts: tuple = (1, 4, 16)) -> None:
+    """Put/get throughput, worst single-put pause and parallel put_many/get_many time for 1, 4 and 16 shards."""
+    keys = ['key' + str(i) for i in range(count)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+    print(f"\nsharded maps over {count} keys (built-in hash)")
+    print(f"{'map':<5}{'shards':>7}{'put/s':>11}{'get/s':>11}{'worst put ms':>14}{'put_many s':>12}{'get_many s':>12}"
+          f"{'shard size min/max':>20}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for shards in shard_counts:
+            # Cyclic garbage collection is paused so its passes don't show up as resize pauses.
+            m = sharded_hash_map.ShardedHashMap(shards, module.HashMap)
+            gc.collect()
+            gc.disable()
+            worst, start = 0.0, time.perf_counter()
+            for key in keys:
+                before = time.perf_counter()
+                m.put(key, key)
+                worst = max(worst, time.perf_counter() - before)
+            put = time.perf_counter() - start
+            gc.enable()
+            get = _time(lambda: [m.get(key) for key in keys])
+
+            bulk = sharded_hash_map.ShardedHashMap(shards, module.HashMap)
+            put_many = _time(bulk.put_many, pairs)
+            get_many = _time(bulk.get_many, keys)
+            bulk.close()
+            sizes = [stats[0] for stats in m.shard_stats()._data]
+            print(f"{name:<5}{shards:>7}{count / put:>11.0f}{count / get:>11.0f}{worst * 1000:>14.2f}{put_many:>12.3f}"
+                  f"{get_many:>12.3f}{str(min(sizes)) + '/' + str(max(sizes)):>20}")
+
+
+def _legacy_next_prime(capacity: int) -> int:
+    """Next prime as it was found before the prime table: odd candidates checked by trial division."""
+    if capacity % 2 == 0:
+        capacity += 1
+    while True:
+        factor = 3
+        while factor ** 2 <= capacity and capacity % factor:
+            factor += 2
+        if factor ** 2 > capacity:
+            return capacity
+        capacity += 2
+
+
+def bench_capacity(exponents: tuple = (10, 16, 20, 24, 28, 31), sizes: tuple = (1 << 10, 1 << 14, 1 << 17)) -> None:
+    """Cost of rounding a capacity (trial division, prime table, power of two) and of building and doubling each table kind."""
+    print("\ncapacity rounding (microseconds per call)")
+    print(f"{'capacity':>12}{'trial div':>12}{'table/MR':>12}{'pow2':>9}")
+    for exponent in exponents:
+        capacity = 1 << exponent
+        calls = 10
+        legacy = _time(lambda: [_legacy_next_prime(capacity) for _ in range(calls)])
+        table = _time(lambda: [next_prime(capacity) for _ in range(calls)])
+        power = _time(lambda: [next_power_of_two(capacity) for _ in range(calls)])
+        print(f"{'2^' + str(exponent):>12}{legacy / calls * 1e6:>12.1f}{table / calls * 1e6:>12.1f}"
+              f"{power / calls * 1e6:>9.2f}")
+
+    print("\nconstruction + fill + one doubling resize (seconds), prime vs power of two capacities")
+    print(f"{'map':<6}{'mode':<7}{'entries':>10}{'build':>9}{'fill':>9}{'resize':>9}{'capacity':>10}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        for size in sizes:
+            keys = ['key' + str(i) for i in range(size)]
+            for mode, power_of_two in (('prime', False), ('pow2', True)):
+                build = _time(lambda: module.HashMap(size, hash_function_builtin, power_of_two=power_of_two))
+                m = module.HashMap(11, hash_function_builtin, power_of_two=power_of_two)
+                fill = _time(lambda: [m.put(key, key) for key in keys])
+                resize = _time(m.resize_table, 2 * m.get_capacity())
+                print(f"{name:<6}{mode:<7}{size:>10}{build:>9.3f}{fill:>9.3f}{resize:>9.3f}{m.get_capacity():>10}")
+
+
+_worker_table = None
+
+
+def _attach_worker(name: str) -> None:
+    """Pool initializer: attach the shared table once per worker process."""
+    global _worker_table
+    _worker_table = shared_hash_map.SharedHashMap(name)
+
+
+def _build_worker(pairs: list) -> None:
+    """Pool initializer: build a private OA copy of the table, as workers did before the shared table."""
+    global _worker_table
+    _worker_table = hash_map_oa.HashMap(11, hash_function_fold64)
+    _worker_table.put_many(pairs)
+
+
+def _worker_lookups(keys: list) -> int:
+    """Pool task: look every key up in this worker's table and return how many were found."""
+    get = _worker_table.get
+    return sum(1 for key in keys if get(key) is not None)
+
+
+def bench_shared(count: int = 200000, process_counts: tuple = (1, 2, 4, 8), lookups: int = 400000) -> None:
+    """Attach time of a shared table against building a private OA copy, then pool lookups/s for 1 to 8 processes."""
+    keys = ['key' + str(i) for i in range(count)]
+    pairs = [(key, i) for i, key in enumerate(keys)]
+    table = shared_hash_map.SharedHashMap.create(pairs)
+    name = table.get_name()
+    attach = _time(lambda: [shared_hash_map.SharedHashMap(name).close() for _ in range(100)]) / 100
+    build = _time(_build_worker, pairs)
+    print(f"\nshared table of {count} keys, {table._memory.size / 2 ** 20:.1f} MB segment")
+    print(f"attach {attach * 1000:.3f} ms, private OA build {build * 1000:.1f} ms")
+
+    # Every process count gets fresh workers, so startup is timed along with the lookups.
+    rng = random.Random(7)
+    chunks = [[rng.choice(keys) for _ in range(lookups // 64)] for _ in range(64)]
+    print(f"{'processes':<10}{'shared lookups/s':>18}{'private lookups/s':>19}")
+    for processes in process_counts:
+        rates = []
+        for initializer, argument in ((_attach_worker, name), (_build_worker, pairs)):
+            start = time.perf_counter()
+            with multiprocessing.Pool(processes, initializer, (argument,)) as pool:
+                found = sum(pool.map(_worker_lookups, chunks))
+            rates.append(found / (time.perf_counter() - start))
+        print(f"{processes:<10}{rates[0]:>18.0f}{rates[1]:>19.0f}")
+    table.close()
+    table.unlink()
+
+
+def _cold_start(mode: str, path: str, count: int, lookups: int) -> tuple:
+    """Run in a fresh process: make the map ready the given way, do lookups, return (ready s, lookup s, peak RSS MB)."""
+    start = time.perf_counter()
+    if mode == 'put':
+        m = hash_map_oa.HashMap(11, hash_function_fold64)
+        for i in range(count):
+            m.put('key' + str(i), i)
+    else:
+        m = hash_map_oa.HashMap.load(path, mmap=mode == 'mmap')
+    ready = time.perf_counter() - start
+    rng = random.Random(7)
+    keys = ['key' + str(rng.randrange(count)) for _ in range(lookups)]
+    lookup = _time(lambda: [m.get(key) for key in keys])
+    # VmHWM rather than ru_maxrss, which carries over the parent's peak across fork and exec.
+    with open('/proc/self/status') as status:
+        peak = next(int(line.split()[1]) for line in status if line.startswith('VmHWM'))
+    return ready, lookup, peak / 1024
+
+
+def bench_persist(count: int = 1000000, lookups: int = 100000) -> None:
+    """Cold start of a saved OA map: rebuilding through put against load(mmap=False) and load(mmap=True), each in a new process."""
+    path = '/tmp/benchmark_persist.hmap'
+    m = hash_map_oa.HashMap(11, hash_function_fold64)
+    m.put_many(('key' + str(i), i) for i in range(count))
+    save = _time(m.save, path)
+    del m
+    print(f"\ncold start of {count} keys, {os.path.getsize(path) / 2 ** 20:.1f} MB file saved in {save:.2f} s")
+    print(f"{'start':<10}{'ready s':>10}{'lookups/s':>12}{'peak RSS MB':>13}")
+    context = multiprocessing.get_context('spawn')
+    for mode in ('put', 'load', 'mmap'):
+        with context.Pool(1) as pool:
+            ready, lookup, rss = pool.apply(_cold_start, (mode, path, count, lookups))
+        print(f"{mode:<10}{ready:>10.3f}{lookups / lookup:>12.0f}{rss:>13.1f}")
+    os.remove(path)
+
+
+def _timed(fn, *args) -> tuple:
+    """Return a tuple of wall clock seconds taken by fn(*args) and its result."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_pickle(count: int = 1000000) -> None:
+    """Dump/load time and size of both maps: default pickling of their attributes against flat __reduce_ex__ state."""
+    print(f"\npickling {count} entries (fold64 hash, protocol 5)")
+    print(f"{'map':<5}{'format':<16}{'dump s':>9}{'load s':>9}{'MB':>8}")
+    for module in (hash_map_sc, hash_map_oa):
+        name = module.__name__[-2:].upper()
+        m = module.HashMap(11, hash_function_fold64)
+        m.put_many(('key' + str(i), i) for i in range(count))
+
+        # Before __reduce_ex__, pickle walked the attribute dict: bucket array, linked lists or entries, and every node.
+        # Out of band buffers are collected by buffer_callback and counted in the size.  Cyclic garbage collection is paused,
+        # its passes over the million live source nodes would otherwise dominate every load.
+        gc.collect()
+        gc.disable()
+        for label, source, out_of_band in (('attributes', m.__dict__, False), ('flat', m, False), ('flat, buffers', m, True)):
+            buffers = []
+            callback = buffers.append if out_of_band else None
+            dump, data = _timed(lambda: pickle.dumps(source, 5, buffer_callback=callback))
+            load = _time(lambda: pickle.loads(data, buffers=buffers))
+            size = len(data) + sum(buffer.raw().nbytes for buffer in buffers)
+            print(f"{name:<5}{label:<16}{dump:>9.3f}{load:>9.3f}{size / 2 ** 20:>8.1f}")
+        gc.enable()
+
+
+def bench_probing(capacity: int = 50021, loads: tuple = (0.25, 0.5, 0.75, 0.85, 0.9)) -> None:
+    """Probe length mean/max, ops/s and bytes per entry of each OA probing strategy at fixed capacity and rising load."""
+    print(f"\nOA probing strategies, {capacity} slots (fold64 hash)")
+    print(f"{'probing':<12}{'load':>6}{'hit mean':>10}{'hit max':>9}{'miss mean':>11}{'miss max':>10}{'put/s':>10}"
+          f"{'hit/s':>10}{'miss/s':>10}{'pop/s':>10}{'B/entry':>9}")
+    for probing in hash_map_oa.PROBING:
+        for load in loads:
+            # Quadratic probing on a prime table can't go past half full.
+            if probing == 'quadratic' and load > 0.5:
+                continue
+            count = int(load * capacity)
+            keys = ['key' + str(i) for i in range(count)]
+            misses = ['miss' + str(i) for i in range(count)]
+            max_load = min(load + 0.05, 0.5 if probing == 'quadratic' else 0.95)
+
+            tracemalloc.start()
+            m = hash_map_oa.HashMap(capacity, hash_function_fold64, probing=probing, max_load=max_load)
+            for key in keys:
+                m.put(key, 0)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            hits = [_oa_probe_length(m, key) for key in keys]
+            missed = [_oa_probe_length(m, key) for key in misses]
+
+            # Best of three timed runs with cyclic garbage collection paused, each on a freshly built map.
+            gc.collect()
+            gc.disable()
+            put = hit = miss = pop = float('inf')
+            for _ in range(3):
+                m = hash_map_oa.HashMap(capacity, hash_function_fold64, probing=probing, max_load=max_load)
+                put = min(put, _time(lambda: [m.put(key, 0) for key in keys]))
+                hit = min(hit, _time(lambda: [m.get(key) for key in keys]))
+                miss = min(miss, _time(lambda: [m.get(key) for key in misses]))
+                pop = min(pop, _time(lambda: [m.pop(key) for key in keys]))
+            gc.enable()
+            print(f"{probing:<12}{load:>6}{sum(hits) / count:>10.2f}{max(hits):>9}{sum(missed) / count:>11.2f}"
+                  f"{max(missed):>10}{count / put:>10.0f}{count / hit:>10.0f}{count / miss:>10.0f}{count / pop:>10.0f}"
+                  f"{memory / count:>9.0f}")
+
+
+def bench_tail(count: int = 100000, lookups: int = 200000) -> None:
+    """p50/p99/p999/max get latency of the SC, OA and cuckoo maps, for hits and misses in random order."""
+    print(f"\nget latency (microseconds) over {lookups} lookups, half hits, in maps of {count} keys")
+    print(f"{'function':<24}{'map':<16}{'p50':>8}{'p99':>8}{'p999':>9}{'max':>10}{'load':>7}")
+    keys = ['key' + str(i) for i in range(count)]
+    rng = random.Random(7)
+    probes = [rng.choice(keys) if i % 2 else 'miss' + str(i) for i in range(lookups)]
+    makers = (('SC', lambda function: hash_map_sc.HashMap(11, function)),
+              ('OA', lambda function: hash_map_oa.HashMap(11, function)),
+              ('OA robin hood', lambda function: hash_map_oa.HashMap(11, function, probing='robin_hood')),
+              ('cuckoo', lambda function: hash_map_cuckoo.HashMap(11, function, seed=7)))
+    # Cuckoo hashing needs a strong hash: keys sharing a weak hash's buckets evict each other endlessly.
+    for function in (hash_function_fold64, hash_function_builtin):
+        for name, make in makers:
+            m = make(function)
+            for key in keys:
+                m.put(key, 0)
+
+            # Cyclic garbage collection is paused so its passes don't show up in the tail.
+            gc.collect()
+            gc.disable()
+            samples = []
+            for key in probes:
+                start = time.perf_counter_ns()
+                m.get(key)
+                samples.append((time.perf_counter_ns() - start) / 1000)
+            gc.enable()
+            samples.sort()
+            print(f"{function.__name__:<24}{name:<16}{_percentile(samples, 0.5):>8.2f}{_percentile(samples, 0.99):>8.2f}"
+                  f"{_percentile(samples, 0.999):>9.2f}{samples[-1]:>10.1f}{m.table_load():>7.2f}")
+
+
+def bench_collide(sizes: tuple = (100, 1000, 5040), repeat: int = 3) -> None:
+    """Build time and get latency of SC maps holding keys that all share one hash, with and without sorted chains."""
+    print("\nanagram keys under hash_function_1 (one shared hash), SC map, get latency in microseconds, best of "
+          + str(repeat) + " per key")
+    print(f"{'keys':>6}  {'chains':<10}{'build s':>9}{'hit mean':>10}{'hit max':>9}{'miss mean':>11}{'miss max':>10}")
+    anagrams = [''.join(letters) for letters in itertools.permutations('abcdefg')]
+
+    # 'a' + 'c' weighs the same as 'b' + 'b', so these keys share the hash of the anagrams without being any of them.
+    misses = sorted(set(''.join(letters) for letters in itertools.permutations('bbbdefg')))
+    for count in sizes:
+        keys = anagrams[:count]
+        for name, treeify in (('linked', False), ('sorted', True)):
+            m = hash_map_sc.HashMap(11, hash_function_1, treeify=treeify)
+            build = _time(lambda: [m.put(key, 0) for key in keys])
+
+            # Every key is timed on its own, keeping its best run so scheduler noise doesn't pose as a slow key.
+            gc.collect()
+            gc.disable()
+            timings = []
+            for probes in (keys, misses):
+                samples = []
+                for key in probes:
+                    best = None
+                    for _ in range(repeat):
+                        start = time.perf_counter_ns()
+                        m.get(key)
+                        elapsed = time.perf_counter_ns() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    samples.append(best / 1000)
+                timings.append(samples)
+            gc.enable()
+            hits, missed = timings
+            print(f"{count:>6}  {name:<10}{build:>9.3f}{sum(hits) / len(hits):>10.2f}{max(hits):>9.1f}"
+                  f"{sum(missed) / len(missed):>11.2f}{max(missed):>10.1f}")
+
+
+def _longest_path(m, keys: list) -> int:
+    """Return the longest chain (SC) or probe path (OA) a lookup of one of keys walks."""
+    if isinstance(m, hash_map_oa.HashMap):
+        return max(_oa_probe_length(m, key) for key in keys)
+    return max(m._buckets.get_at_index(m._hash_function(key) % m._capacity).length() for key in keys)
+
+
+def _colliding_keys(function: callable, capacity: int, count: int) -> list:
+    """Return count keys that function sends to slot 0 of a table of capacity, found by brute force."""
+    keys, i = [], 0
+    while len(keys) < count:
+        key = 'x' + str(i)
+        if function(key) % capacity == 0:
+            keys.append(key)
+        i += 1
+    return keys
+
+
+def bench_flood(count: int = 2000, leaked: int = 500, capacity: int = 2003) -> None:
+    """Hash flooding: insert and get cost of attacker-picked keys against fixed, seeded and reseeding maps."""
+    print(f"\nhash flooding, {count} anagrams (one hash_function_1 hash) and {leaked} keys colliding under a leaked seed")
+    print(f"{'attack':<14}{'map':<26}{'insert s':>10}{'get us':>9}{'longest':>9}{'reseeds':>9}")
+    anagrams = [''.join(letters) for letters in itertools.permutations('abcdefg')][:count]
+
+    # With a leaked seed the attacker can aim every key at one slot, as long as the table keeps its capacity.
+    seed = 1234
+    aimed = _colliding_keys(SeededHash(seed), capacity, leaked)
+    attacks = (
+        ('known hash', anagrams, (
+            ('SC hash_function_1 linked', lambda: hash_map_sc.HashMap(11, hash_function_1, treeify=False)),
+            ('SC hash_function_1', lambda: hash_map_sc.HashMap(11, hash_function_1)),
+            ('SC seeded', lambda: hash_map_sc.HashMap(11, SeededHash())),
+            ('OA hash_function_1', lambda: hash_map_oa.HashMap(11, hash_function_1)),
+            ('OA seeded', lambda: hash_map_oa.HashMap(11, SeededHash())))),
+        ('leaked seed', aimed, (
+            ('SC seeded linked', lambda: hash_map_sc.HashMap(capacity, SeededHash(seed), treeify=False)),
+            ('SC seeded', lambda: hash_map_sc.HashMap(capacity, SeededHash(seed))),
+            ('SC seeded, reseed 16', lambda: hash_map_sc.HashMap(capacity, SeededHash(seed), treeify=False,
+                                                                 reseed_threshold=16)),
+            ('OA seeded', lambda: hash_map_oa.HashMap(capacity, SeededHash(seed))),
+            ('OA seeded, reseed 32', lambda: hash_map_oa.HashMap(capacity, SeededHash(seed), reseed_threshold=32)))),
+    )
+    for attack, keys, makers in attacks:
+        for name, make in makers:
+            m = make()
+            insert = _time(lambda: [m.put(key, 0) for key in keys])
+            get = _time(lambda: [m.get(key) for key in keys]) / len(keys) * 10 ** 6
+            print(f"{attack:<14}{name:<26}{insert:>10.3f}{get:>9.2f}{_longest_path(m, keys):>9}"
+                  f"{m.get_reseed_count():>9}")
+
+
+class _BareSCMap(hash_map_sc.HashMap):
+    """SC map whose get and put run as they did before stats were added, with no check of whether stats are enabled."""
+
+    def get(self, key: str):
+        hash = self._hash_function(key)
+        if self._old_buckets is None:
+            node = self._buckets.get_at_index(hash % self._capacity).contains(key)
+        else:
+            node = self._find_node(key, hash)[1]
+        return node.value if node is not None else None
+
+    def _locate(self, key: str):
+        self._make_room()
+        hash = self._hash_function(key)
+        bucket, node = self._find_node(key, hash)
+        if node is not None:
+            return node, True
+        self._size += 1
+        self._version += 1
+        node = bucket.insert(key, None, hash)
+        if bucket.length() > self._chain_limit:
+            self._long_chain(hash % self._capacity)
+        return node, False
+
+
+class _BareOAMap(hash_map_oa.HashMap):
+    """OA map whose get and put run as they did before stats were added, with no check of whether stats are enabled."""
+
+    def get(self, key: str):
+        hash = self._hash_function(key)
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_resize)
+        entry = self._find(key, hash)
+        return entry.value if entry and not entry.is_tombstone else None
+
+    def _locate(self, key: str):
+        if self.table_load() >= self._max_load:
+            if self._incremental_resize > 0:
+                self._start_migration(2 * self._capacity)
+            else:
+                self.resize_table(2 * self._capacity)
+        elif (self._size + self._tombstones) / self._capacity >= self._max_load:
+            self._compact()
+        hash = self._hash_function(key)
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_resize)
+            entry = self._find_old(key, hash) if self._old_buckets is not None else None
+            if entry:
+                return entry, True
+        located = self._locate_hashed(key, hash)
+        if self._crowded:
+            self._reseed()
+        return located
+
+
+def bench_stats(count: int = 5000, repeat: int = 101) -> None:
+    """
+    put and get throughput of a map without the stats check (bare), and of maps with stats never enabled, enabled, and
+    enabled then disabled again, each against bare.  A map without stats runs its plain lookups behind one check, so off
+    shows the cost of that check, and on the cost of counting.
+    """
+    print(f"\nstats overhead, {count} puts then {count} gets, best of {repeat} (thousand ops/s)")
+    print(f"{'map':<6}{'stats':<14}{'put':>9}{'get':>9}{'put vs bare':>13}{'get vs bare':>13}")
+    keys = ['key' + str(i) for i in range(count)]
+    for name, module, bare in (('SC', hash_map_sc, _BareSCMap), ('OA', hash_map_oa, _BareOAMap)):
+        maps = {'bare': bare(11, hash_function_fold64), 'off': module.HashMap(11, hash_function_fold64),
+                'on': module.HashMap(11, hash_function_fold64, stats=True),
+                'on, then off': module.HashMap(11, hash_function_fold64, stats=True)}
+        maps['on, then off'].disable_stats()
+
+        # Modes take turns within each round, so drift in machine speed hits them all alike.
+        best = {mode: [float('inf'), float('inf')] for mode in maps}
+        for _ in range(repeat):
+            for mode, m in maps.items():
+                m.clear()
+                best[mode][0] = min(best[mode][0], _time(lambda: [m.put(key, 0) for key in keys]))
+                best[mode][1] = min(best[mode][1], _time(lambda: [m.get(key) for key in keys]))
+        put_bare, get_bare = best['bare']
+        for mode, (put, get) in best.items():
+            print(f"{name:<6}{mode:<14}{count / put / 1000:>9.0f}{count / get / 1000:>9.0f}"
+                  f"{(put / put_bare - 1) * 100:>+12.1f}%{(get / get_bare - 1) * 100:>+12.1f}%")
+
+
+BENCHMARKS = {
+    'probe': bench_probe,
+    'probing': bench_probing,
+    'resize': bench_resize,
+    'latency': bench_latency,
+    'tail': bench_tail,
+    'collide': bench_collide,
+    'flood': bench_flood,
+    'stats': bench_stats,
+    'hash': bench_hash,
+    'memory': bench_memory,
+    'soa': bench_soa,
+    'batch': bench_batch,
+    'capacity': bench_capacity,
+    'lookup': bench_lookup,
+    'count': bench_count,
+    'stream': bench_stream,
+    'views': bench_views,
+    'scan': bench_scan,
+    'concurrent': bench_concurrent,
+    'sharded': bench_sharded,
+    'shared': bench_shared,
+    'persist': bench_persist,
+    'pickle': bench_pickle,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
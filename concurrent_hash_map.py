@@ -0,0 +1,347 @@
+# Implements a thread-safe hash map using separate chaining with striped locks.
+
+import threading
+from operator import add
+
+from include import DynamicArray, LinkedList, hash_function_1, is_prime, next_prime
+
+
+def _replace(old: object, new: object) -> object:
+    """Combine function for put: the new value wins"""
+    return new
+
+
+def _keep(old: object, new: object) -> object:
+    """Combine function for setdefault: the old value wins"""
+    return old
+
+
+class ConcurrentHashMap:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1, stripes: int = 16) -> None:
+        """
+        Initialize new ConcurrentHashMap that uses
+        separate chaining for collision resolution
+        Bucket i is guarded by lock i % stripes.  Writers take the lock of their bucket only.
+        Readers take no lock: a chain only changes by publishing a fully built node or by
+        unlinking one, and a resize builds a new bucket array while holding every lock, then
+        swaps it in with a single assignment.  Readers already walking the old array finish
+        there undisturbed.
+        """
+        self._buckets = DynamicArray([LinkedList() for _ in range(next_prime(max(capacity, 3)))])
+        self._hash_function = function
+
+        # one lock and one entry count per stripe, a count is only changed under its stripe's lock
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._counts = [0] * stripes
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        buckets = self._buckets
+        out = ''
+        for i in range(buckets.length()):
+            out += str(i) + ': ' + str(buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map.  While writers are running it's a snapshot that may already be out of date.
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._buckets.length()
+
+    # ------------------------------------------------------------------ #
+
+    def table_load(self) -> float:
+        """
+        Method returns current hash table load factor.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Method returns number of empty buckets in hash table.
+        """
+        buckets = self._buckets
+        return sum(1 for i in range(buckets.length()) if buckets.get_at_index(i).length() == 0)
+
+    def _lock_bucket(self, hash: int) -> (LinkedList, int):
+        """
+        Method acquires stripe lock of the bucket hash falls in and returns a tuple of that bucket and its stripe.  If a resize
+        swapped the bucket array before the lock was taken, the lock is dropped and the current array is tried instead.
+        """
+        locks = self._locks
+        while True:
+            buckets = self._buckets
+            index = hash % buckets.length()
+            stripe = index % len(locks)
+            locks[stripe].acquire()
+            if self._buckets is buckets:
+                return buckets.get_at_index(index), stripe
+            locks[stripe].release()
+
+    def _acquire_all(self) -> None:
+        """
+        Method acquires every stripe lock, always in the same order so two threads doing it can't deadlock.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _release_all(self) -> None:
+        """
+        Method releases every stripe lock.
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def upsert(self, key: str, value: object, combine: callable) -> object:
+        """
+        Method puts value under given key if key isn't in hash map, otherwise replaces its value by combine(old value, value).
+        Returns value stored.  It runs under the stripe lock of key's bucket, so it's atomic against every other writer.
+        """
+        # Initialize hash, then lock bucket.  Statement, check if key exists.  If so, combine values.  If not, insert value and
+        # count it in its stripe.
+        hash = self._hash_function(key)
+        bucket, stripe = self._lock_bucket(hash)
+        try:
+            node = bucket.contains(key)
+            if node is not None:
+                node.value = combine(node.value, value)
+                return node.value
+            bucket.insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        # Key was inserted.  Statement, check if the load factor reached 1.0, if so, resize.
+        if sum(self._counts) >= self._buckets.length():
+            self._grow()
+        return value
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method updates key/value pair in hash map.  If given key already exists in hash map, associated value is replaced with new
+        value.  If given key is not in hash map, new key/value pair is added.  The table is also resized to double its current
+        capacity when the current load factor of table is greater than or equal to 1.0.
+        """
+        self.upsert(key, value, _replace)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, default is put under key and returned.
+        Atomic, so exactly one of several threads racing on a missing key gets its default stored.
+        """
+        return self.upsert(key, default, _keep)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Method atomically adds delta to value associated with given key and returns new value.  If key isn't in hash map, it's
+        added with delta as its value.
+        """
+        return self.upsert(key, delta, add)
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Method atomically replaces value associated with given key by function(value) and returns new value.  If key isn't in
+        hash map, function(default) is put under key.  function runs under a stripe lock and must not use this hash map.
+        """
+        # Initialize hash, then lock bucket.  Statement, check if key exists.  If so, apply function.  If not, insert
+        # function(default) and count it in its stripe.
+        hash = self._hash_function(key)
+        bucket, stripe = self._lock_bucket(hash)
+        try:
+            node = bucket.contains(key)
+            if node is not None:
+                node.value = function(node.value)
+                return node.value
+            value = function(default)
+            bucket.insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        # Key was inserted.  Statement, check if the load factor reached 1.0, if so, resize.
+        if sum(self._counts) >= self._buckets.length():
+            self._grow()
+        return value
+
+    def get(self, key: str) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns None.  Takes no lock.
+        """
+        return self.get_or_default(key)
+
+    def get_or_default(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns default.  Takes no lock.
+        """
+        # Initialize bucket array once so a concurrent resize can't swap it mid-lookup.  Walk chain of key's bucket.
+        buckets = self._buckets
+        node = buckets.get_at_index(self._hash_function(key) % buckets.length()).contains(key)
+        if node is not None:
+            return node.value
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method returns True if given key is in hash map, otherwise returns False.  Takes no lock.
+        """
+        buckets = self._buckets
+        return buckets.get_at_index(self._hash_function(key) % buckets.length()).contains(key) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Method removes given key and its associated value from hash map.  If key isn't in hash map, method does nothing.
+        """
+        self.pop(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Method removes given key from hash map and returns its associated value.  If key isn't in hash map, method returns default.
+        """
+        # Lock bucket of key, unlink its node and uncount it from its stripe.
+        bucket, stripe = self._lock_bucket(self._hash_function(key))
+        try:
+            node = bucket.pop(key)
+            if node is None:
+                return default
+            self._counts[stripe] -= 1
+            return node.value
+        finally:
+            self._locks[stripe].release()
+
+    def _grow(self) -> None:
+        """
+        Method doubles capacity once the load factor has reached 1.0.  Threads that see a full table at the same time all call
+        it, the first one to get every lock resizes and the others find the load factor back under 1.0 and do nothing.
+        """
+        self._acquire_all()
+        try:
+            capacity = self._buckets.length()
+            if sum(self._counts) >= capacity:
+                self._rehash(next_prime(2 * capacity))
+        finally:
+            self._release_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method changes capacity of internal hash table.  All existing key/value pairs remain in new hash map and all hash table
+        links are rehashed.  First, check that new_capacity is not less than 1, if so, method does nothing.  If new_capacity
+        is 1 or more, check that it's a prime number.  If not, change it to next highest prime number.
+        """
+        # Statement, check if capacity is less than 1, if so, do nothing.
+        if new_capacity < 1:
+            return
+
+        # Statement, check if capacity is a prime number, if not, change it to next highest prime number.
+        if not is_prime(new_capacity):
+            new_capacity = next_prime(new_capacity)
+
+        # Lock every stripe.  Loop while the entries would push the new table past the 1.0 load factor, double capacity.
+        self._acquire_all()
+        try:
+            size = sum(self._counts)
+            while size > 0 and (size - 1) / new_capacity >= 1.0:
+                new_capacity = next_prime(2 * new_capacity)
+            self._rehash(new_capacity)
+        finally:
+            self._release_all()
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method copies every node into a new bucket array of new_capacity and swaps it in.  Must be called holding every stripe
+        lock.  Nodes are copied rather than relinked, so readers still walking the old array see unchanged chains.  Entry
+        counts are redistributed over stripes for the new bucket numbering.
+        """
+        # Initialize new buckets and counts.  Loop old buckets, insert a copy of each node into its new bucket and count it.
+        stripes = len(self._locks)
+        buckets = [LinkedList() for _ in range(new_capacity)]
+        counts = [0] * stripes
+        old = self._buckets
+        for i in range(old.length()):
+            for node in old.get_at_index(i):
+                index = node.hash % new_capacity
+                buckets[index].insert(node.key, node.value, node.hash)
+                counts[index % stripes] += 1
+
+        # Publish new buckets with a single assignment.
+        self._counts = counts
+        self._buckets = DynamicArray(buckets)
+
+    def clear(self) -> None:
+        """
+        Method clears contents of hash map.  It doesn't change underlying hash table capacity.
+        """
+        self._acquire_all()
+        try:
+            self._counts = [0] * len(self._locks)
+            self._buckets = DynamicArray([LinkedList() for _ in range(self._buckets.length())])
+        finally:
+            self._release_all()
+
+    def items(self):
+        """
+        Method returns a generator over (key, value) tuples of hash map.  It walks the bucket array current when it starts and
+        takes no lock, so it never raises: entries added or removed meanwhile may or may not be seen, others are seen once.
+        """
+        buckets = self._buckets
+        return ((node.key, node.value) for i in range(buckets.length()) for node in buckets.get_at_index(i))
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
+        array do not matter.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import sys
+
+    print("\nStress test - counters, private keys and readers across resizes")
+    print("---------------------------------------------------------------")
+    sys.setswitchinterval(1e-5)
+    threads, rounds, shared = 8, 5000, 97
+    m = ConcurrentHashMap(3, stripes=4)
+    for i in range(100):
+        m.put('stable' + str(i), i)
+    errors = []
+
+    def writer(thread: int) -> None:
+        for i in range(rounds):
+            m.increment('shared' + str(i % shared))
+            key = 't' + str(thread) + '-' + str(i)
+            m.put(key, i)
+            if i % 2:
+                if m.pop(key) != i:
+                    errors.append(key)
+
+    def reader() -> None:
+        for i in range(rounds):
+            if m.get('stable' + str(i % 100)) != i % 100:
+                errors.append('stable' + str(i % 100))
+
+    workers = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    workers += [threading.Thread(target=reader) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    counts = [m.get('shared' + str(i)) for i in range(shared)]
+    expected = [threads * len(range(i, rounds, shared)) for i in range(shared)]
+    print("shared counters exact:", counts == expected)
+    print("private keys left:", all(m.get('t' + str(t) + '-' + str(i)) == (None if i % 2 else i)
+                                    for t in range(threads) for i in range(rounds)))
+    print("reader errors:", len(errors))
+    print("size consistent:", m.get_size() == len(list(m.items())) == 100 + shared + threads * rounds // 2)
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2))
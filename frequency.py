@@ -0,0 +1,227 @@
+# Streaming frequency counting on top of the separate chaining hash map.
+
+from heapq import heappush, heapreplace, nlargest
+from itertools import count as _sequence
+from operator import itemgetter
+
+from include import DynamicArray, hash_function_builtin
+from hash_map_sc import HashMap
+
+
+class FrequencyCounter:
+    def __init__(self, items=None, function: callable = hash_function_builtin) -> None:
+        """
+        Initialize new FrequencyCounter, optionally counting every item of an iterable
+        Counts are kept in a separate chaining HashMap.  Highest frequency and its keys are kept
+        up to date on every add, so mode is O(1) and input is read in a single pass.  top_k and
+        histogram scan the count map in place instead of copying it.
+        """
+        self._counts = HashMap(11, function)
+        self._total = 0
+
+        # running maximum and keys that reached it
+        self._frequency = 0
+        self._mode = []
+
+        if items is not None:
+            self.update(items)
+
+    def add(self, key: object, count: int = 1) -> int:
+        """
+        Method counts key count more times and returns its new count.  count must be positive.
+        """
+        # Initialize new count.
+        new = self._counts.increment(key, count)
+        self._total += count
+
+        # Statement, check if count passes highest frequency, if so, start a new mode.  Statement, check if count equals highest
+        # frequency, if so, append key to mode.
+        if new > self._frequency:
+            self._frequency, self._mode = new, []
+        if new == self._frequency:
+            self._mode.append(key)
+        return new
+
+    def update(self, items) -> None:
+        """
+        Method counts every item of an iterable or generator once, e.g. the lines of an open file.  Items are consumed as they
+        come, nothing is buffered.
+        """
+        add = self.add
+        for item in items:
+            add(item)
+
+    def get(self, key: object) -> int:
+        """
+        Method returns count of key, 0 if it hasn't been seen.
+        """
+        return self._counts.get_or_default(key, 0)
+
+    def total(self) -> int:
+        """
+        Method returns number of items counted.
+        """
+        return self._total
+
+    def distinct(self) -> int:
+        """
+        Method returns number of distinct keys counted.
+        """
+        return self._counts.get_size()
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Method returns a tuple of a dynamic array of the most frequent keys, in the order they reached that frequency, and the
+        frequency itself.  Both are tracked while counting, so this is O(number of modes).
+        """
+        return DynamicArray(self._mode), self._frequency
+
+    def top_k(self, k: int) -> DynamicArray:
+        """
+        Method returns a dynamic array of (key, count) tuples for the k most frequent keys, most frequent first.  A heap of size
+        k is kept while the count map is walked once in place, so this is O(n log k).
+        """
+        return DynamicArray(nlargest(k, self._counts.items(), key=itemgetter(1)))
+
+    def histogram(self) -> DynamicArray:
+        """
+        Method returns a dynamic array of (count, number of keys with that count) tuples in increasing count order.  It has one
+        entry per distinct count, which is at most about sqrt(2 * total).
+        """
+        # Initialize histogram keyed by count.  Loop count map in place, increment slot of each count.
+        histogram = HashMap(11, hash_function_builtin)
+        for count in self._counts.values():
+            histogram.increment(count)
+        pairs = histogram.get_keys_and_values()
+        return DynamicArray(sorted(pairs.get_at_index(i) for i in range(pairs.length())))
+
+
+class SpaceSaving:
+    def __init__(self, capacity: int, items=None, function: callable = hash_function_builtin) -> None:
+        """
+        Initialize new SpaceSaving counter that tracks at most capacity keys, optionally counting an iterable
+        Space-Saving (Metwally et al.) keeps approximate counts in bounded memory: when a new key
+        arrives and every counter is taken, the key with the smallest count is evicted and the new
+        key inherits its count.  Counts are never underestimated and are overestimated by at most
+        total / capacity, so every key occurring more than total / capacity times is tracked.
+        """
+        self._capacity = capacity
+        self._counts = HashMap(11, function)
+        self._errors = HashMap(11, function)
+        self._total = 0
+
+        # min heap of [count, sequence, key], one per tracked key.  Counts in it may lag behind the count map, which only grows.
+        self._heap = []
+        self._sequence = _sequence()
+
+        if items is not None:
+            self.update(items)
+
+    def add(self, key: object, count: int = 1) -> int:
+        """
+        Method counts key count more times and returns its estimated count.  count must be positive.
+        """
+        self._total += count
+
+        # Increment counter of key, which adds key with count if it isn't tracked.  Statement, check if key was tracked, i.e. its
+        # count is more than count, if so, return it.
+        counts = self._counts
+        new = counts.increment(key, count)
+        if new > count:
+            return new
+
+        # Statement, check if there is a free counter, if so, key keeps it with no error.
+        if counts.get_size() <= self._capacity:
+            self._errors.put(key, 0)
+            heappush(self._heap, [count, next(self._sequence), key])
+            return count
+
+        # Every counter is taken.  Loop heap until its top holds a current count, refreshing stale entries.  That key has the
+        # smallest count: evict it and hand its counter to key, which inherits the count as error.
+        heap = self._heap
+        while True:
+            top = heap[0]
+            current = counts.get(top[2])
+            if top[0] == current:
+                break
+            heapreplace(heap, [current, top[1], top[2]])
+        counts.remove(top[2])
+        self._errors.remove(top[2])
+        counts.put(key, current + count)
+        self._errors.put(key, current)
+        heapreplace(heap, [current + count, next(self._sequence), key])
+        return current + count
+
+    def update(self, items) -> None:
+        """
+        Method counts every item of an iterable or generator once.  Memory stays bounded by capacity however many distinct
+        items there are.
+        """
+        add = self.add
+        for item in items:
+            add(item)
+
+    def get(self, key: object) -> int:
+        """
+        Method returns estimated count of key, 0 if it isn't tracked.
+        """
+        return self._counts.get_or_default(key, 0)
+
+    def error(self, key: object) -> int:
+        """
+        Method returns how much the count of key may be overestimated by, 0 if it isn't tracked.
+        """
+        return self._errors.get_or_default(key, 0)
+
+    def total(self) -> int:
+        """
+        Method returns number of items counted.
+        """
+        return self._total
+
+    def top_k(self, k: int) -> DynamicArray:
+        """
+        Method returns a dynamic array of (key, estimated count, error) tuples for the k keys with the highest estimated counts,
+        highest first.  A key is guaranteed to belong in the true top k if its count minus its error is at least the estimate
+        of the (k + 1)th key.
+        """
+        top = nlargest(k, self._counts.items(), key=itemgetter(1))
+        return DynamicArray([(key, count, self._errors.get(key)) for key, count in top])
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Method returns a tuple of a dynamic array of the keys with the highest estimated count and that estimate.
+        """
+        pairs = list(self._counts.items())
+        frequency = max((count for _, count in pairs), default=0)
+        return DynamicArray([key for key, count in pairs if count == frequency]), frequency
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nFrequencyCounter - mode, top_k and histogram")
+    print("--------------------------------------------")
+    counter = FrequencyCounter(['2', '4', '2', '6', '8', '4', '1', '3', '4', '5', '7', '3', '3', '2'])
+    mode, frequency = counter.mode()
+    print(f"Mode : {[mode[i] for i in range(mode.length())]}, Frequency: {frequency}")
+    top = counter.top_k(4)
+    print("Top 4:", [top[i] for i in range(top.length())])
+    histogram = counter.histogram()
+    print("Histogram:", [histogram[i] for i in range(histogram.length())])
+    print(counter.total(), counter.distinct(), counter.get('2'), counter.get('9'))
+
+    print("\nFrequencyCounter - generator input")
+    print("----------------------------------")
+    counter = FrequencyCounter(word for line in ["a b c", "b c", "c"] for word in line.split())
+    mode, frequency = counter.mode()
+    print(f"Mode : {[mode[i] for i in range(mode.length())]}, Frequency: {frequency}")
+
+    print("\nSpaceSaving - 3 counters")
+    print("------------------------")
+    approximate = SpaceSaving(3, 'abracadabra alakazam')
+    top = approximate.top_k(3)
+    print("Top 3:", [top[i] for i in range(top.length())])
+    mode, frequency = approximate.mode()
+    print(f"Mode : {[mode[i] for i in range(mode.length())]}, Frequency: {frequency}")
@@ -0,0 +1,470 @@
+# Implements a hash map using bucketized cuckoo hashing.
+
+import random
+from itertools import permutations
+
+from include import DynamicArray, HashEntry, SeededHash, hash_function_1, mix64
+
+
+_MASK_32 = 0xFFFFFFFF
+
+# Highest max_load by bucket size, a little under the load where cuckoo insertion starts failing for random keys.  Buckets of 4
+# or more entries use the last one.
+_MAX_LOADS = (0.45, 0.85, 0.9, 0.95)
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = None,
+                 bucket_size: int = 4,
+                 stash_size: int = 4,
+                 max_load: float = None,
+                 max_kicks: int = 500,
+                 seed: int = None) -> None:
+        """
+        Initialize new HashMap that uses
+        cuckoo hashing for collision resolution
+        Entries live in two tables of buckets holding bucket_size entries each.  A key
+        can only sit in one bucket of each table, picked by the two halves of its hash
+        mixed with a seed, or in a stash of about stash_size entries, so a lookup checks two
+        buckets and the stash and nothing else.  An insert finding both buckets full
+        evicts an entry to its bucket in the other table, and so on for up to max_kicks
+        moves.  An entry still homeless after that goes to the stash.  Once the stash is
+        full the table is rebuilt with a new seed, and it grows when max_load of it is used,
+        or when rebuilds with new seeds keep overflowing the stash.
+        max_load defaults to 0.9, or less for buckets too small to reach it: 0.45 for one
+        entry per bucket, 0.85 for two.  A higher max_load than bucket_size supports, see
+        _MAX_LOADS, raises ValueError.
+        When function isn't given, keys are hashed with a SeededHash that a rebuild redraws,
+        so keys crowding the same buckets are split up by their new hashes.  A given function
+        keeps its hashes across rebuilds and keys whose hashes are equal can't be told apart by
+        any seed or capacity: hash_function_1, for one, gives every anagram the same hash.  A
+        put of a key that too many keys share a hash with raises RuntimeError and leaves hash
+        map unchanged.
+        Seeds and eviction choices come from random.Random(seed).
+        """
+        # Statement, check if bucket size is at least one, if not, raise.  Statement, check if max load is given, if not,
+        # default it, otherwise check bucket size supports it, if not, raise.
+        if bucket_size < 1:
+            raise ValueError(f"bucket_size must be at least 1, not {bucket_size}")
+        limit = _MAX_LOADS[min(bucket_size, len(_MAX_LOADS)) - 1]
+        if max_load is None:
+            max_load = min(0.9, limit)
+        elif not 0 < max_load <= limit:
+            raise ValueError(f"max_load must be more than 0 and at most {limit} for buckets of {bucket_size}, not {max_load}")
+
+        self._random = random.Random(seed)
+
+        # Statement, check if function is given, if so, keep it, otherwise draw a SeededHash that rebuilds redraw.
+        self._reseed_keys = function is None
+        self._hash_function = SeededHash(self._random.getrandbits(128)) if function is None else function
+        self._bucket_size = bucket_size
+        self._stash_size = stash_size
+        self._max_load = max_load
+        self._max_kicks = max_kicks
+        self._size = 0
+
+        # bumped on every insert, removal and rebuild so live iterators can detect changes
+        self._version = 0
+
+        self._allocate(capacity)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        size = self._bucket_size
+        for bucket in range(2 * self._bucket_count):
+            entries = [self._slots.get_at_index(i) for i in range(bucket * size, bucket * size + size)]
+            out += str(bucket) + ': ' + ', '.join(str(entry) for entry in entries if entry) + '\n'
+        out += 'stash: ' + ', '.join(str(entry) for entry in self._stash) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Method replaces tables and stash with empty ones holding at least capacity slots in total, and draws a new seed.  Both
+        tables share one slot array, the second table starting where the first ends.
+        """
+        self._bucket_count = max(1, -(-capacity // (2 * self._bucket_size)))
+        self._slots = DynamicArray([None] * (2 * self._bucket_count * self._bucket_size))
+        self._seed = self._random.getrandbits(64)
+        self._stash = []
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the number of table slots.  The stash isn't counted.
+        """
+        return 2 * self._bucket_count * self._bucket_size
+
+    # ------------------------------------------------------------------ #
+
+    def _buckets(self, hash: int) -> (int, int):
+        """
+        Method returns a tuple of the first slot index of the bucket hash maps to in each table.  The hash is mixed with the
+        seed once, and each half of the result is reduced to a bucket number by multiply and shift, which works for any bucket
+        count.
+        """
+        mixed = mix64(hash ^ self._seed)
+        count, size = self._bucket_count, self._bucket_size
+        return ((mixed & _MASK_32) * count >> 32) * size, (((mixed >> 32) * count >> 32) + count) * size
+
+    def _find(self, key: str, hash: int) -> HashEntry:
+        """
+        Method returns entry holding key, or None if key isn't in hash map.  It checks the bucket of key in each table, then the
+        stash, and never anything else.
+        """
+        # Loop slots of key's bucket in each table, check for a matching cached hash and key.
+        first, second = self._buckets(hash)
+        size = self._bucket_size
+        slot = self._slots.get_at_index
+        for start in (first, second):
+            for i in range(start, start + size):
+                entry = slot(i)
+                if entry is not None and entry.hash == hash and entry.key == key:
+                    return entry
+
+        # Loop stash, which is empty most of the time.
+        for entry in self._stash:
+            if entry.hash == hash and entry.key == key:
+                return entry
+        return None
+
+    def _place_free(self, entry: HashEntry) -> bool:
+        """
+        Method puts entry in a free slot of its bucket in either table and returns True, or returns False if both are full.
+        """
+        size = self._bucket_size
+        slots = self._slots
+        for start in self._buckets(entry.hash):
+            for i in range(start, start + size):
+                if slots.get_at_index(i) is None:
+                    slots.set_at_index(i, entry)
+                    return True
+        return False
+
+    def _place(self, entry: HashEntry) -> HashEntry:
+        """
+        Method puts entry in the tables, evicting entries to their bucket in the other table when its buckets are full.  Returns
+        None once every entry has a slot, or the entry left homeless after max_kicks evictions.
+        """
+        # Statement, check if either bucket has a free slot, if so, done.
+        if self._place_free(entry):
+            return None
+
+        # Statement, check if both buckets are full of entries with the same hash as entry, if so, evictions would only move
+        # them around each other, so entry is homeless straight away.
+        size = self._bucket_size
+        slots = self._slots
+        hash = entry.hash
+        first, second = self._buckets(hash)
+        if all(slots.get_at_index(i).hash == hash for start in (first, second) for i in range(start, start + size)):
+            return entry
+
+        # Loop evictions.  Swap entry with a random entry of its bucket.  The evicted entry's only other bucket is the one it
+        # doesn't sit in: statement, check if it has a free slot, if so, place it and finish.
+        start = first
+        for _ in range(self._max_kicks):
+            victim = start + self._random.randrange(size)
+            entry, evicted = slots.get_at_index(victim), entry
+            slots.set_at_index(victim, evicted)
+
+            first, second = self._buckets(entry.hash)
+            start = second if first == start else first
+            for i in range(start, start + size):
+                if slots.get_at_index(i) is None:
+                    slots.set_at_index(i, entry)
+                    return None
+        return entry
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method updates key/value pair in hash map.  If given key already exists in hash map, associated value is replaced with new
+        value.  If given key is not in hash map, new key/value pair is added.  The table is also resized to double its current
+        capacity when the new pair would push the load factor past max_load.  Raises RuntimeError, with hash map unchanged, when
+        more keys share the hash of key under the given hash function than its two buckets and the stash can hold.
+        """
+        # Initialize hash.  Statement, check if key exists, if so, replace its value.
+        hash = self._hash_function(key)
+        entry = self._find(key, hash)
+        if entry is not None:
+            entry.value = value
+            return
+
+        # Statement, check if the new entry would pass max load, if so, resize to double current capacity.  A rebuild may draw
+        # a new key hash, so hash key again.
+        if self._size + 1 > self._max_load * self.get_capacity():
+            self._rehash(2 * self.get_capacity())
+            hash = self._hash_function(key)
+
+        # Place new entry and increment size.  Statement, check if an entry was left homeless, if so, stash it.  If that fills
+        # the stash past its size, check if no seed or capacity can place every entry, if so, take key out again and raise.
+        # Otherwise, rebuild with new seeds.
+        self._size += 1
+        self._version += 1
+        homeless = self._place(HashEntry(key, value, hash))
+        if homeless is not None:
+            self._stash.append(homeless)
+            if len(self._stash) > self._stash_size:
+                if not self._reseed_keys and self._unplaceable() > self._stash_size:
+                    self.pop(key)
+                    if len(self._stash) > self._stash_size:
+                        self._rehash(self.get_capacity())
+                    raise RuntimeError(f"{key!r} shares its hash with too many keys to fit its two buckets and a stash of "
+                                       f"{self._stash_size} under the given hash function")
+                self._rehash(self.get_capacity())
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method rebuilds hash map with a new seed and at least new_capacity slots.  An attempt that leaves more homeless entries
+        than the stash holds is retried with another seed, and with the default SeededHash each retry also draws a new key hash
+        and hashes every key again.  After four attempts the capacity is doubled and tried again, so the stash always ends up
+        holding its homeless entries.  Callers only rebuild entries that fit, see _unplaceable.
+        """
+        # Initialize every entry of tables and stash.
+        entries = list(self._stash)
+        for i in range(self._slots.length()):
+            entry = self._slots.get_at_index(i)
+            if entry is not None:
+                entries.append(entry)
+
+        # Loop attempts.  Statement, check if this is a retry with the default key hash, if so, draw a new one and hash every
+        # key again.  Allocate empty tables with a new seed, place every entry, collect homeless entries in the stash.
+        # Statement, check if the stash holds them, if so, stop.  After four attempts, double capacity.
+        self._version += 1
+        attempt = 0
+        while True:
+            if attempt > 0 and self._reseed_keys:
+                function = self._hash_function = SeededHash(self._random.getrandbits(128))
+                for entry in entries:
+                    entry.hash = function(entry.key)
+            if attempt > 0 and attempt % 4 == 0:
+                new_capacity = 2 * self.get_capacity()
+            self._allocate(new_capacity)
+            stash = []
+            for entry in entries:
+                homeless = self._place(entry)
+                if homeless is not None:
+                    stash.append(homeless)
+            self._stash = stash
+            if len(stash) <= self._stash_size:
+                return
+            attempt += 1
+
+    def _unplaceable(self) -> int:
+        """
+        Method returns how many entries have to be stashed whatever the seed or capacity.  Entries whose hashes are equal always
+        map to the same two buckets, so past 2 * bucket_size of them the rest can only go to the stash.
+        """
+        counts = {}
+        for entry in self._entries():
+            counts[entry.hash] = counts.get(entry.hash, 0) + 1
+        room = 2 * self._bucket_size
+        return sum(count - room for count in counts.values() if count > room)
+
+    def table_load(self) -> float:
+        """
+        Method returns current hash table load factor.
+        """
+        return self._size / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Method returns number of empty slots in the tables.
+        """
+        return self.get_capacity() - self._size + len(self._stash)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method changes capacity of internal hash table.  All existing key/value pairs remain in new hash map and are placed again
+        with new seeds.  If new_capacity is less than size, method does nothing.  Capacity is rounded up to a whole number of
+        buckets per table, and doubled while the entries would put the load factor past max_load.
+        """
+        # Statement, check if capacity is less than size, if so, do nothing.
+        if new_capacity < self._size:
+            return
+
+        # Loop while the entries would pass max load, double capacity.
+        while self._size > self._max_load * new_capacity:
+            new_capacity *= 2
+        self._rehash(new_capacity)
+
+    def get(self, key: str) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns None.
+        """
+        return self.get_or_default(key)
+
+    def get_or_default(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns default.
+        """
+        entry = self._find(key, self._hash_function(key))
+        return entry.value if entry is not None else default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method returns True if given key is in hash map, otherwise returns False.
+        """
+        return self._find(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Method removes given key and its associated value from hash map.  If key isn't in hash map, method does nothing.
+        """
+        self.pop(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Method removes given key from hash map and returns its associated value.  If key isn't in hash map, method returns
+        default.  Removing from the tables frees a slot, so stashed entries are tried in the tables again.
+        """
+        # Loop slots of key's bucket in each table.  If key found, empty its slot, decrement size, move stashed entries that now
+        # fit into the tables and return value.
+        hash = self._hash_function(key)
+        size = self._bucket_size
+        slots = self._slots
+        for start in self._buckets(hash):
+            for i in range(start, start + size):
+                entry = slots.get_at_index(i)
+                if entry is not None and entry.hash == hash and entry.key == key:
+                    slots.set_at_index(i, None)
+                    self._size -= 1
+                    self._version += 1
+                    self._stash = [stashed for stashed in self._stash if not self._place_free(stashed)]
+                    return entry.value
+
+        # Loop stash.  If key found, drop it from stash and decrement size.
+        for i, entry in enumerate(self._stash):
+            if entry.hash == hash and entry.key == key:
+                del self._stash[i]
+                self._size -= 1
+                self._version += 1
+                return entry.value
+        return default
+
+    def clear(self) -> None:
+        """
+        Method clears contents of hash map.  It doesn't change underlying hash table capacity.
+        """
+        self._allocate(self.get_capacity())
+        self._size = 0
+        self._version += 1
+
+    def _entries(self):
+        """
+        Method is a generator yielding every entry of hash map, tables first, then stash.  Raises RuntimeError if hash map has an
+        entry added or removed, or is rebuilt, while the generator is running.
+        """
+        version = self._version
+        slots = self._slots
+        for i in range(slots.length()):
+            entry = slots.get_at_index(i)
+            if entry is not None:
+                if self._version != version:
+                    raise RuntimeError("hash map changed during iteration")
+                yield entry
+        for entry in self._stash:
+            if self._version != version:
+                raise RuntimeError("hash map changed during iteration")
+            yield entry
+        if self._version != version:
+            raise RuntimeError("hash map changed during iteration")
+
+    def keys(self):
+        """
+        Method returns a generator over keys of hash map.
+        """
+        return (entry.key for entry in self._entries())
+
+    def values(self):
+        """
+        Method returns a generator over values of hash map.
+        """
+        return (entry.value for entry in self._entries())
+
+    def items(self):
+        """
+        Method returns a generator over (key, value) tuples of hash map.
+        """
+        return ((entry.key, entry.value) for entry in self._entries())
+
+    def __iter__(self):
+        """
+        Method enables hash map to iterate across itself, yielding a HashEntry per entry.
+        """
+        return self._entries()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
+        array do not matter.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nCuckoo - put, get, remove and resize")
+    print("------------------------------------")
+    m = HashMap(11, seed=1)
+    for i in range(1000):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2), m.empty_buckets())
+    print(m.get('key1'), m.get('key999'), m.get('missing'), m.contains_key('key500'), m.contains_key('missing'))
+    m.put('key1', 'replaced')
+    for i in range(0, 1000, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get('key1'), m.get('key2'), m.pop('key3'), m.pop('key3', 'gone'))
+    m.resize_table(600)
+    print(m.get_size(), m.get_capacity(), all(m.get('key' + str(i)) == i for i in range(5, 1000, 2)))
+    m.resize_table(10)
+    print(m.get_size(), m.get_capacity())
+
+    print("\nCuckoo - one slot buckets, stash of 2")
+    print("-------------------------------------")
+    m = HashMap(11, bucket_size=1, stash_size=2, max_load=0.45, seed=1)
+    for i in range(500):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2), len(m._stash) <= 2)
+    print(sorted(m.keys(), key=int)[:5], sum(m.values()) == sum(i * 10 for i in range(500)))
+    m.clear()
+    print(m.get_size(), m.get_capacity(), m.get_keys_and_values())
+
+    print("\nCuckoo - keys sharing one hash overflow the stash")
+    print("-------------------------------------------------")
+    m = HashMap(11, hash_function_1, seed=1)
+    try:
+        for letters in permutations('abcd'):
+            m.put(''.join(letters), 1)
+    except RuntimeError as error:
+        print(error)
+    print(m.get_size(), len(m._stash), m.get('abcd'), m.get(''.join(letters)))
+    m.put('abcd', 2)
+    m.put('efgh', 3)
+    print(m.get_size(), m.get('abcd'), m.get('efgh'))
+    m = HashMap(11, seed=1)
+    for letters in permutations('abcd'):
+        m.put(''.join(letters), 1)
+    print(m.get_size(), len(m._stash), m.get('dcba'))
+
+    print("\nCuckoo - max load by bucket size")
+    print("--------------------------------")
+    for bucket_size in (1, 2, 4):
+        m = HashMap(11, bucket_size=bucket_size, seed=1)
+        for i in range(20000):
+            m.put(str(i), i)
+        print(bucket_size, m._max_load, m.get_size(), m.get_capacity(), len(m._stash) <= m._stash_size)
+    try:
+        HashMap(11, bucket_size=2, max_load=0.9)
+    except ValueError as error:
+        print(error)
@@ -1,29 +1,105 @@
 # Implements a hash map using separate chaining.
 
+import copyreg
+import sys
+import time
+from pickle import PickleBuffer
 
-from include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from include import (DynamicArray, HashMapStats, LinkedList, MixedHash, SeededHash, SLNode, SortedChain,
+                        hash_function_1, hash_function_2, hash_function_is_stable, is_prime, next_prime,
+                        next_power_of_two, pack_hashes, unpack_hashes)
+
+
+# A chain longer than TREEIFY_THRESHOLD becomes a SortedChain, and turns back into a LinkedList once it's down to
+# UNTREEIFY_THRESHOLD nodes.  The gap keeps a chain hovering around the limit from converting back and forth.
+TREEIFY_THRESHOLD = 8
+UNTREEIFY_THRESHOLD = 6
+
+
+def _search(bucket, key: str) -> (SLNode, int):
+    """Return a tuple of the node of key in bucket, or None if it isn't there, and the number of nodes compared"""
+    if type(bucket) is SortedChain:
+        return bucket.search(key)
+    compared = 0
+    for node in bucket:
+        compared += 1
+        if node.key == key:
+            return node, compared
+    return None, compared
+
+
+def _treeify_chains(buckets: list, threshold: int) -> None:
+    """Replace every LinkedList of buckets longer than threshold by a SortedChain of its nodes, in place"""
+    for i in range(len(buckets)):
+        if buckets[i].length() > threshold:
+            buckets[i] = SortedChain(buckets[i])
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental_resize: int = 0,
+                 power_of_two: bool = False,
+                 treeify: bool = True,
+                 reseed_threshold: int = None,
+                 stats: bool = False) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        If incremental_resize is positive, growing the table moves that many old
+        buckets per put/get/contains_key/remove instead of rehashing all at once.
+        If power_of_two is True, capacities are powers of two instead of primes
+        and hashes go through mix64 so the low bits used for indexing are spread.
+        If treeify is True, a chain longer than TREEIFY_THRESHOLD is kept sorted by
+        key and binary searched, so keys sharing a hash cost O(log n) instead of O(n).
+        If reseed_threshold is given, function must be a SeededHash, and an insert
+        that makes a chain longer than reseed_threshold rehashes every key under a
+        new seed, once per table capacity, to break up a flood of colliding keys.
+        If stats is True, operations are counted from the start, see enable_stats.
         """
+        # Statement, check if reseeding is asked for without a seeded hash function, if so, raise.
+        if reseed_threshold is not None and not isinstance(function, SeededHash):
+            raise ValueError("reseed_threshold needs a SeededHash function")
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number, or a power of two in power of two mode
+        self._power_of_two = power_of_two
+        self._capacity = next_power_of_two(capacity) if power_of_two else self._next_prime(capacity)
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        self._hash_function = function
+        self._hash_function = MixedHash(function) if power_of_two else function
         self._size = 0
 
+        # chains longer than this become sorted chains, never when treeify is off
+        self._treeify = treeify
+        self._treeify_threshold = TREEIFY_THRESHOLD if treeify else sys.maxsize
+
+        # a chain longer than this gets the keys rehashed under a new seed, at most once per capacity; inserts only look
+        # further when a chain passes the smaller of the two limits
+        self._reseed_threshold = reseed_threshold
+        self._reseed_limit = sys.maxsize if reseed_threshold is None else reseed_threshold
+        self._chain_limit = min(self._treeify_threshold, self._reseed_limit)
+        self._reseed_capacity = 0
+        self._reseeds = 0
+
+        # operation statistics, None unless enabled
+        self._stats = None
+        if stats:
+            self.enable_stats()
+
+        # bumped on every insert, removal and rebuild so live iterators can detect changes
+        self._version = 0
+
+        # old table kept alive while an incremental resize is migrating, and buckets of the new table created so far
+        self._incremental_resize = incremental_resize
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+        self._fill_index = 0
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -36,36 +112,28 @@ class HashMap:
 
     def _next_prime(self, capacity: int) -> int:
         """
-        Increment from given number and the find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Increment from given number and the find the closest odd prime number
+        Uses the precomputed prime table in include, falling back to Miller-Rabin past it
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(max(capacity, 3))
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
+        return is_prime(capacity)
 
-        return True
+    def _round_capacity(self, capacity: int) -> int:
+        """
+        Method returns capacity a table asked for capacity buckets gets: next power of two in power of two mode, otherwise
+        capacity itself if it's prime or the next highest prime number if not.
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        if not self._is_prime(capacity):
+            return self._next_prime(capacity)
+        return capacity
 
     def get_size(self) -> int:
         """
@@ -89,27 +157,29 @@ class HashMap:
         value.  If given key is not in hash map, new key/value pair is added.  The table is also resized to double its current
         capacity when the current load factor of table is greater than or equal to 1.0.
         """
-        # Statement, check if the load factor is greater than or equal to 1.0, if so, resize to double its current capacity.
-        if self.table_load() >= 1.0:
-            self.resize_table(2 * self._capacity)
-
-        # Initialize index, bucket and hash key.
-        index = self._hash_function(key) % self._buckets.length()
-        bucket = self._buckets.get_at_index(index)
-        cur = bucket.contains(key)
+        # Find or insert node for key with a single chain walk, then set its value.
+        self._locate(key)[0].value = value
 
-        # Statement, check if key exists.  If so, replace its associated value.  If not, insert value and increment size.
-        if cur != None:
-            cur.value = value
-        else:
-            bucket.insert(key, value)
-            self._size += 1
+    def _make_room(self) -> None:
+        """
+        Method grows table before an insert.  Table is resized to double its current capacity when the current load factor of
+        table is greater than or equal to 1.0.
+        """
+        # Statement, check if the load factor is greater than or equal to 1.0, if so, resize to double its current capacity.  In
+        # incremental mode, start migrating to the bigger table instead.
+        if self.table_load() >= 1.0:
+            if self._incremental_resize > 0:
+                self._start_migration(2 * self._capacity)
+            else:
+                self.resize_table(2 * self._capacity)
 
     def empty_buckets(self) -> int:
         """
         Method returns number of empty buckets in hash table.
         """
-        # Initialize counter.  Loop hash map, check if buckets are empty, if so, increment counter.  Return counter.
+        # Finish any incremental resize.  Initialize counter.  Loop hash map, check if buckets are empty, if so, increment counter.
+        # Return counter.
+        self._finish_migration()
         counter = 0
         for i in range(self._capacity):
             if self._buckets.get_at_index(i).length() == 0:
@@ -126,10 +196,12 @@ class HashMap:
         """
         Method clears contents of hash map.  It doesn't change underlying hash table capacity.
         """
-        # Loop array, clear hash map and update size.
+        # Loop array, clear hash map, drop old table of any incremental resize and update size.
         for i in range(self._capacity):
             self._buckets.set_at_index(i, LinkedList())
+        self._old_buckets = None
         self._size = 0
+        self._version += 1
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -141,65 +213,574 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        # Statement, check if capacity is a prime number, if not, change it to next highest prime number.
-        if not self._is_prime(new_capacity):
-            new_capacity = self._next_prime(new_capacity)
+        # Finish any incremental resize so every node is in the current table.
+        self._finish_migration()
 
-        # Initialize current buckets, length of buckets, size as zero, capacity as new capacity and new array.
-        curBuckets = self._buckets
-        curBucketsLen = self._capacity
-        self._size = 0
+        # Statement, check if capacity is a prime number, if not, change it to next highest prime number (or power of two).
+        new_capacity = self._round_capacity(new_capacity)
+
+        # Loop while the entries would push the new table past the 1.0 load factor put enforces, double capacity as put would.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 1.0:
+            new_capacity = self._round_capacity(2 * new_capacity)
+
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method moves every node straight into a new bucket array of new_capacity.  Existing nodes are relinked using their cached
+        hash instead of going through put, so nothing is allocated per entry and no duplicate search is done.  Every chain
+        starts out as a LinkedList, so sorted chains that got short are converted back for free.
+        """
+        # Initialize start time and new buckets.  Loop current buckets, relink each node at the front of its new bucket.
+        start = time.perf_counter()
+        buckets = [LinkedList() for _ in range(new_capacity)]
+        for i in range(self._capacity):
+            for node in self._buckets.get_at_index(i):
+                buckets[node.hash % new_capacity].insert_node(node)
+
+        # Sort chains that are still too long, and update buckets and capacity.  Size is unchanged.
+        _treeify_chains(buckets, self._treeify_threshold)
+        self._buckets = DynamicArray(buckets)
         self._capacity = new_capacity
-        self._buckets = DynamicArray()
+        self._version += 1
 
-        # Loop array, add values to linked list.
-        for i in range(new_capacity):
-            self._buckets.append(LinkedList())
+        # Statement, check if stats are enabled, if so, count and time rebuild, and start longest chain over from the new table.
+        if self._stats is not None:
+            self._stats.resizes += 1
+            self._stats.resize_seconds += time.perf_counter() - start
+            self._stats.longest = self._longest_chain()
 
-        # Move current data to new buckets with bigger capacity.
-        for i in range(curBucketsLen):
-            cur = curBuckets.get_at_index(i)
-            if cur != None:
-                for node in cur:
-                    self.put(node.key, node.value)
+    def _treeify_bucket(self, index: int) -> None:
+        """
+        Method replaces the chain at index of the current table by a SortedChain of its nodes, if it's a LinkedList longer than
+        TREEIFY_THRESHOLD and treeify is on.
+        """
+        bucket = self._buckets.get_at_index(index)
+        if type(bucket) is LinkedList and bucket.length() > self._treeify_threshold:
+            self._buckets.set_at_index(index, SortedChain(bucket))
+
+    def _untreeify_bucket(self, index: int) -> None:
+        """
+        Method replaces the chain at index of the current table by a LinkedList of its nodes, in the same order, if it's a
+        SortedChain down to UNTREEIFY_THRESHOLD nodes.
+        """
+        bucket = self._buckets.get_at_index(index)
+        if type(bucket) is SortedChain and bucket.length() <= UNTREEIFY_THRESHOLD:
+            chain = LinkedList()
+            for node in reversed(list(bucket)):
+                chain.insert_node(node)
+            self._buckets.set_at_index(index, chain)
+
+    def _long_chain(self, index: int) -> None:
+        """
+        Method handles a chain of the current table that an insert made longer than the smaller of TREEIFY_THRESHOLD and
+        reseed_threshold: rehashes under a new seed if it's over reseed_threshold, otherwise sorts it.
+        """
+        if self._buckets.get_at_index(index).length() > self._reseed_limit and self._capacity != self._reseed_capacity:
+            self._reseed()
+        else:
+            self._treeify_bucket(index)
+
+    def _reseed(self) -> None:
+        """
+        Method switches to a SeededHash with a new seed and rebuilds the table at its current capacity, recomputing the cached
+        hash of every node.  Keys that collided under the old seed are spread out unless they collide under every seed.
+        """
+        # Finish any incremental resize.  Initialize new hash function.  Loop nodes, rehash each key.
+        self._finish_migration()
+        function = SeededHash()
+        self._hash_function = MixedHash(function) if self._power_of_two else function
+        for i in range(self._capacity):
+            for node in self._buckets.get_at_index(i):
+                node.hash = self._hash_function(node.key)
+
+        # Relink nodes by their new hashes.  Remember capacity, so a flood that survives reseeding doesn't reseed again until
+        # the table grows.
+        self._rehash(self._capacity)
+        self._reseed_capacity = self._capacity
+        self._reseeds += 1
+
+    def get_reseed_count(self) -> int:
+        """
+        Return number of times hash map rehashed its keys under a new seed after a chain got longer than reseed_threshold
+        """
+        return self._reseeds
+
+    def _find_node(self, key: str, hash: int) -> (LinkedList, SLNode):
+        """
+        Method returns a tuple of the bucket that holds key and its node, or of the bucket key belongs in and None if it isn't in
+        hash map.  Each chain is walked once.  While an incremental resize is in progress, a step of it is migrated first and
+        the old table is searched when the new bucket has no match.
+        """
+        # Statement, check if an incremental resize is in progress, if so, migrate a step.
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_resize)
+
+        # Initialize bucket, creating it if an incremental resize hasn't yet, and node.  Statement, check if key is still in old
+        # table, if so, return old bucket and its node.  Otherwise, return bucket and node.
+        index = hash % self._capacity
+        bucket = self._buckets.get_at_index(index)
+        if bucket is None:
+            bucket = self._new_bucket(index)
+        node = bucket.contains(key)
+        if node is None and self._old_buckets is not None:
+            old_bucket = self._old_buckets.get_at_index(hash % self._old_capacity)
+            old_node = old_bucket.contains(key)
+            if old_node is not None:
+                return old_bucket, old_node
+        return bucket, node
+
+    def _search_node(self, key: str, hash: int) -> (LinkedList, SLNode, int):
+        """
+        Method returns the tuple _find_node does, with the number of nodes compared added, without migrating a step.  It's the
+        counting search lookups run instead of contains while stats are enabled.
+        """
+        index = hash % self._capacity
+        bucket = self._buckets.get_at_index(index)
+        if bucket is None:
+            bucket = self._new_bucket(index)
+        node, length = _search(bucket, key)
+        if node is None and self._old_buckets is not None:
+            old_bucket = self._old_buckets.get_at_index(hash % self._old_capacity)
+            old_node, old_length = _search(old_bucket, key)
+            if old_node is not None:
+                return old_bucket, old_node, length + old_length
+            length += old_length
+        return bucket, node, length
+
+    def _lookup(self, op: str, key: str, hash: int) -> (LinkedList, SLNode):
+        """
+        Method returns the tuple _find_node does and records the nodes compared under op.  Lookups call it instead of
+        _find_node while stats are enabled.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_resize)
+        bucket, node, length = self._search_node(key, hash)
+        self._stats.record(op, length)
+        return bucket, node
 
     def get(self, key: str):
         """
         Method returns value associated with given key.  If key isn't in hash map, method returns None.
         """
-        # Initialize index.  Statement, check if hash map contains key.  If so, return value.  Otherwise, return None.
-        index = self._hash_function(key) % self._capacity
-        if self._buckets.get_at_index(index).contains(key):
-            return self._buckets.get_at_index(index).contains(key).value
+        # Initialize node, counting the lookup if stats are enabled, otherwise reading the bucket straight away unless an
+        # incremental resize is in progress.  Statement, check if hash map contains key.  If so, return value.  Otherwise,
+        # return None.
+        hash = self._hash_function(key)
+        if self._stats is not None:
+            node = self._lookup('get', key, hash)[1]
+        elif self._old_buckets is None:
+            node = self._buckets.get_at_index(hash % self._capacity).contains(key)
         else:
-            return None
+            node = self._find_node(key, hash)[1]
+        if node is not None:
+            return node.value
+        return None
+
+    def get_or_default(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns default.
+        """
+        # Initialize node, counting the lookup if stats are enabled, otherwise reading the bucket straight away unless an
+        # incremental resize is in progress.  Statement, check if hash map contains key.  If so, return value.  Otherwise,
+        # return default.
+        hash = self._hash_function(key)
+        if self._stats is not None:
+            node = self._lookup('get', key, hash)[1]
+        elif self._old_buckets is None:
+            node = self._buckets.get_at_index(hash % self._capacity).contains(key)
+        else:
+            node = self._find_node(key, hash)[1]
+        if node is not None:
+            return node.value
+        return default
 
     def contains_key(self, key: str) -> bool:
         """
         Method returns True if given key is in hash map, otherwise returns False.  An empty hash doesn't contain any keys.
         """
-        # Initialize index.  Statement, check if hash map contains key.  If so, return True.  Otherwise, return False.
-        index = self._hash_function(key) % self._capacity
-        if self._buckets.get_at_index(index).contains(key):
-            return True
-        return False
+        # Statement, check if stats are enabled, if so, return whether the counted lookup finds a node.  Otherwise, read the
+        # bucket straight away unless an incremental resize is in progress, and return whether node exists.
+        hash = self._hash_function(key)
+        if self._stats is not None:
+            return self._lookup('contains', key, hash)[1] is not None
+        if self._old_buckets is None:
+            return self._buckets.get_at_index(hash % self._capacity).contains(key) is not None
+        return self._find_node(key, hash)[1] is not None
+
+    def _locate(self, key: str) -> (SLNode, bool):
+        """
+        Method returns a tuple of the node holding key and True, walking its chain once.  If key isn't in hash map, a node with no
+        value is inserted for it, growing the table first when it's full, and returned with False so the caller can fill it in.
+        """
+        # Grow table if it's full.  Initialize hash key, bucket and node, counting the lookup if stats are enabled.
+        self._make_room()
+        hash = self._hash_function(key)
+        if self._stats is None:
+            bucket, node = self._find_node(key, hash)
+        else:
+            bucket, node = self._lookup('put', key, hash)
+
+        # Statement, check if key exists.  If so, return its node.  If not, insert an empty node, increment size and sort the
+        # chain or reseed if it got too long.
+        if node is not None:
+            return node, True
+        self._size += 1
+        self._version += 1
+        node = bucket.insert(key, None, hash)
+        if self._stats is not None:
+            self._stats.longest = max(self._stats.longest, bucket.length())
+        if bucket.length() > self._chain_limit:
+            self._long_chain(hash % self._capacity)
+        return node, False
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, default is put under key and returned.  The
+        chain is walked once either way.
+        """
+        node, found = self._locate(key)
+        if not found:
+            node.value = default
+        return node.value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Method adds delta to value associated with given key and returns new value.  If key isn't in hash map, it's added with
+        delta as its value.  Key is hashed and its chain walked once.
+        """
+        node, found = self._locate(key)
+        node.value = node.value + delta if found else delta
+        return node.value
+
+    def update(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Method replaces value associated with given key by function(value) and returns new value.  If key isn't in hash map,
+        function(default) is put under key.  Key is hashed and its chain walked once.
+        """
+        node, found = self._locate(key)
+        node.value = function(node.value if found else default)
+        return node.value
+
+    def upsert(self, key: str, value: object, combine: callable) -> object:
+        """
+        Method puts value under given key if key isn't in hash map, otherwise replaces its value by combine(old value, value).
+        Returns value stored.  Key is hashed and its chain walked once.
+        """
+        node, found = self._locate(key)
+        node.value = combine(node.value, value) if found else value
+        return node.value
 
     def remove(self, key: str) -> None:
         """
         Method removes given key and its associated value from hash map.  If key isn't in hash map, method does nothing.
         """
-        # Initialize index.  Statement, check if hash map contains key.  If so, remove key and decrement size.
-        index = self._hash_function(key) % self._capacity
-        if self._buckets.get_at_index(index).contains(key):
-            self._buckets.get_at_index(index).remove(key)
-            self._size -= 1
+        self.pop(key)
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Method removes given key from hash map and returns its associated value.  If key isn't in hash map, method returns default
+        and hash map is unchanged.  The node is found and unlinked in one walk of its chain.
+        """
+        # Initialize hash.  Statement, check if an incremental resize is in progress, if so, migrate a step.
+        hash = self._hash_function(key)
+        if self._old_buckets is not None:
+            self._migrate(self._incremental_resize)
+
+        # Statement, check if stats are enabled, if so, record the nodes a search for key compares.  Initialize node unlinked
+        # from bucket, which an incremental resize may not have created yet.  Statement, check if key wasn't found and is still
+        # in old table, if so, unlink it from there.
+        if self._stats is not None:
+            self._stats.record('remove', self._search_node(key, hash)[2])
+        index = hash % self._capacity
+        bucket = self._buckets.get_at_index(index)
+        node = bucket.pop(key) if bucket is not None else None
+        if node is None and self._old_buckets is not None:
+            node = self._old_buckets.get_at_index(hash % self._old_capacity).pop(key)
+
+        # Statement, check if a node was unlinked.  If so, turn a sorted chain that got short back into a linked list, decrement
+        # size and return value.  Otherwise, return default.
+        if node is None:
+            return default
+        if type(bucket) is SortedChain:
+            self._untreeify_bucket(index)
+        self._size -= 1
+        self._version += 1
+        return node.value
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Method begins an incremental resize.  Current table becomes the old table and an empty table of new_capacity becomes the
+        new one.  Nodes are moved across by _migrate a few buckets at a time.  Buckets of the new table start out as None and
+        are created as they're first used or, in order, by each step of _migrate, so starting doesn't allocate every chain.
+        """
+        # Statement, check if a migration is still running, if so, finish it before starting another one.
+        self._finish_migration()
+
+        # Statement, check if capacity is a prime number, if not, change it to next highest prime number (or power of two).
+        new_capacity = self._round_capacity(new_capacity)
+
+        # Keep current table as old table and swap in an empty new one.  Statement, check if stats are enabled, if so, count
+        # and time rebuild.
+        start = time.perf_counter()
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        self._fill_index = 0
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._version += 1
+        if self._stats is not None:
+            self._stats.resizes += 1
+            self._stats.resize_seconds += time.perf_counter() - start
+            self._stats.longest = 0
+
+    def _migrate(self, count: int) -> None:
+        """
+        Method moves the next count buckets of the old table into the new table by relinking their nodes.  The old table is
+        dropped once every bucket has moved.
+        """
+        # Initialize start time and stop index.  Loop old buckets from migrate index, relink each node into new table, sorting
+        # chains that get too long and tracking the longest one if stats are enabled, and empty old bucket.
+        start = time.perf_counter()
+        stop = min(self._migrate_index + count, self._old_capacity)
+        stats = self._stats
+        for i in range(self._migrate_index, stop):
+            for node in self._old_buckets.get_at_index(i):
+                index = node.hash % self._capacity
+                bucket = self._buckets.get_at_index(index)
+                if bucket is None:
+                    bucket = self._new_bucket(index)
+                bucket.insert_node(node)
+                if stats is not None:
+                    stats.longest = max(stats.longest, bucket.length())
+                if bucket.length() > self._treeify_threshold:
+                    self._treeify_bucket(index)
+            self._old_buckets.set_at_index(i, LinkedList())
+
+        # Loop new buckets from fill index, in proportion to the old buckets moved, create each one not created yet, so every
+        # bucket exists once the last old bucket has moved.
+        fill = stop * self._capacity // self._old_capacity
+        for i in range(self._fill_index, fill):
+            if self._buckets.get_at_index(i) is None:
+                self._buckets.set_at_index(i, LinkedList())
+        self._fill_index = fill
+
+        # Update migrate index.  Statement, check if every old bucket has moved, if so, drop old table.  Statement, check if
+        # stats are enabled, if so, add time taken to rebuild time.
+        self._migrate_index = stop
+        if stop == self._old_capacity:
+            self._old_buckets = None
+        if self._stats is not None:
+            self._stats.resize_seconds += time.perf_counter() - start
+
+    def _new_bucket(self, index: int) -> LinkedList:
+        """
+        Method creates an empty bucket at index of the new table of an incremental resize, and returns it.
+        """
+        bucket = LinkedList()
+        self._buckets.set_at_index(index, bucket)
+        return bucket
+
+    def _finish_migration(self) -> None:
+        """
+        Method moves all remaining buckets of an in-progress incremental resize.  Does nothing when no resize is in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def migration_progress(self) -> float:
+        """
+        Method returns fraction of old buckets already moved by an in-progress incremental resize, or 1.0 if none is in progress.
+        """
+        if self._old_buckets is None:
+            return 1.0
+        return self._migrate_index / self._old_capacity
+
+    def enable_stats(self) -> None:
+        """
+        Method starts counting operations, see get_stats.  While stats are enabled, lookups run a search that counts the nodes
+        it compares, and a map without stats runs its plain lookups behind one check of whether stats are enabled.  Does
+        nothing if stats are already enabled.
+        """
+        if self._stats is None:
+            self._stats = HashMapStats()
+            self._stats.longest = self._longest_chain()
+
+    def disable_stats(self) -> None:
+        """
+        Method stops counting operations and drops the counters.
+        """
+        self._stats = None
+
+    def reset_stats(self) -> None:
+        """
+        Method zeroes the counters of enabled stats, and starts tracking the longest chain from the one in the table now.
+        """
+        if self._stats is not None:
+            self._stats = None
+            self.enable_stats()
+
+    def _longest_chain(self) -> int:
+        """
+        Method returns length of the longest chain in the current table.  Buckets an incremental resize hasn't created are empty.
+        """
+        buckets = self._buckets
+        return max((buckets.get_at_index(i).length() for i in range(self._capacity) if buckets.get_at_index(i) is not None),
+                   default=0)
+
+    def get_stats(self) -> dict:
+        """
+        Method returns operation statistics since stats were enabled or reset, or None if they aren't enabled: a dict of op
+        counts by op ('get', 'contains', 'put', 'remove'), a histogram of lookup lengths (nodes compared per keyed operation,
+        the whole chain for a miss and the keys a binary search compares in a sorted chain), the longest of them, the count
+        and total seconds of rebuilds, plus current size, capacity, tombstones (always 0 here) and the longest chain an insert
+        made in the current table, tracked since it was built.  Removals don't shorten it.
+        """
+        if self._stats is None:
+            return None
+        stats = self._stats.snapshot()
+        stats.update(size=self._size, capacity=self._capacity, tombstones=0, max_chain_length=self._stats.longest)
+        return stats
+
+    def reserve(self, count: int) -> None:
+        """
+        Method grows hash table, if needed, so it can hold count entries without put resizing it, i.e. keeping the load factor
+        under 1.0.  It never shrinks the table.
+        """
+        # Statement, check if count entries would push the load factor to 1.0, if so, resize once to fit them.
+        if count > 0 and (count - 1) / self._capacity >= 1.0:
+            self.resize_table(count)
+
+    @classmethod
+    def from_items(cls, items, function: callable = hash_function_1, expected_size: int = None, **options) -> "HashMap":
+        """
+        Method builds a new hash map, given options as keyword arguments of the constructor, from an iterable of key/value
+        pairs.  The table is allocated once, big enough for expected_size entries (or the number of pairs when not given) at a
+        load factor under 1.0, then filled in one pass.
+        """
+        items = list(items)
+        if expected_size is None:
+            expected_size = len(items)
+        map = cls(1, function, **options)
+        map.reserve(expected_size)
+        map.put_many(items)
+        return map
+
+    def put_many(self, pairs) -> None:
+        """
+        Method puts every key/value pair of an iterable into hash map.  The table is sized once for the whole batch and keys are
+        hashed up front, so no load factor check or resize happens between pairs.
+        """
+        # Initialize pairs and their hashes.  Finish any incremental resize so the batch goes straight into one table.
+        pairs = list(pairs)
+        function = self._hash_function
+        hashes = [function(key) for key, _ in pairs]
+        self._finish_migration()
+
+        # Reserve room for the batch.
+        self.reserve(self._size + len(pairs))
+
+        # Initialize locals.  Loop pairs, find key in its bucket, with a counted search recorded if stats are enabled.  Check
+        # if key exists.  If so, replace its value.  If not, insert it, increment size, track longest chain if stats are enabled
+        # and sort the chain if it got too long.  Hashes of the batch were taken under the current seed, so a chain over
+        # reseed_threshold is only noted, and reseeding waits for the end of the batch.
+        slot = self._buckets.get_at_index
+        capacity = self._capacity
+        threshold = self._chain_limit
+        stats = self._stats
+        crowded = False
+        for (key, value), hash in zip(pairs, hashes):
+            bucket = slot(hash % capacity)
+            if stats is None:
+                node = bucket.contains(key)
+            else:
+                node, length = _search(bucket, key)
+                stats.record('put', length)
+            if node:
+                node.value = value
+            else:
+                bucket.insert(key, value, hash)
+                self._size += 1
+                self._version += 1
+                if stats is not None:
+                    stats.longest = max(stats.longest, bucket.length())
+                if bucket.length() > threshold:
+                    crowded = crowded or bucket.length() > self._reseed_limit
+                    self._treeify_bucket(hash % capacity)
+
+        # Statement, check if a chain got longer than reseed_threshold, if so, reseed unless it was done at this capacity.
+        if crowded and self._capacity != self._reseed_capacity:
+            self._reseed()
+
+    def _find_many(self, keys, op: str) -> list:
+        """
+        Method returns a list holding the node of each key in keys, or None where a key isn't in hash map.  Keys are hashed up
+        front and looked up without a method call per key.  With stats enabled, each lookup is recorded under op.
+        """
+        # Initialize hashes.  Finish any incremental resize so a single table is searched.
+        function = self._hash_function
+        hashes = [function(key) for key in keys]
+        self._finish_migration()
+
+        # Statement, check if stats are enabled.  If not, return nodes.  Otherwise, loop keys, search for each and record lookup.
+        slot = self._buckets.get_at_index
+        capacity = self._capacity
+        if self._stats is None:
+            return [slot(hash % capacity).contains(key) for key, hash in zip(keys, hashes)]
+        nodes = []
+        for key, hash in zip(keys, hashes):
+            node, length = _search(slot(hash % capacity), key)
+            self._stats.record(op, length)
+            nodes.append(node)
+        return nodes
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method returns a dynamic array with the value of each key in keys, in the same order, or None where a key isn't in hash
+        map.
+        """
+        return DynamicArray([node.value if node else None for node in self._find_many(list(keys), 'get')])
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Method returns a dynamic array with True or False for each key in keys, in the same order, telling if it's in hash map.
+        """
+        return DynamicArray([node is not None for node in self._find_many(list(keys), 'contains')])
+
+    def remove_many(self, keys) -> None:
+        """
+        Method removes every key in keys from hash map.  Keys that aren't in hash map are skipped.
+        """
+        # Initialize keys and hashes.  Finish any incremental resize so a single table is searched.
+        keys = list(keys)
+        function = self._hash_function
+        hashes = [function(key) for key in keys]
+        self._finish_migration()
+
+        # Loop keys, record the nodes a search for each compares if stats are enabled, remove it from its bucket in a single
+        # pass and decrement size if it was there.  Turn sorted chains that got short back into linked lists.
+        slot = self._buckets.get_at_index
+        capacity = self._capacity
+        stats = self._stats
+        for key, hash in zip(keys, hashes):
+            bucket = slot(hash % capacity)
+            if stats is not None:
+                stats.record('remove', _search(bucket, key)[1])
+            if bucket.remove(key):
+                self._size -= 1
+                self._version += 1
+                if type(bucket) is SortedChain:
+                    self._untreeify_bucket(hash % capacity)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
         array do not matter.
         """
-        # Initialize new array.  Loop array, check if a key exists, if so, then add to new array as tuple.  Return new array.
+        # Finish any incremental resize.  Initialize new array.  Loop array, check if a key exists, if so, then add to new array as
+        # tuple.  Return new array.
+        self._finish_migration()
         NewArray = DynamicArray()
         for i in range(self._capacity):
             cur = self._buckets.get_at_index(i)
@@ -208,6 +789,146 @@ class HashMap:
                     NewArray.append((node.key, node.value))
         return NewArray
 
+    def __getstate__(self) -> tuple:
+        """
+        Method returns hash map as flat sequences instead of its bucket array, linked lists and nodes: a tuple of constructor
+        options, capacity, keys, values and cached hashes, the hashes packed into one array when they fit 64 bits.
+        """
+        # Finish any incremental resize.  Loop buckets and their nodes, collect key, value and hash of each.
+        self._finish_migration()
+        keys, values, hashes = [], [], []
+        for i in range(self._capacity):
+            for node in self._buckets.get_at_index(i):
+                keys.append(node.key)
+                values.append(node.value)
+                hashes.append(node.hash)
+        function = self._hash_function.function if self._power_of_two else self._hash_function
+        options = (function, self._incremental_resize, self._power_of_two, self._treeify, self._reseed_threshold,
+                   self._stats is not None)
+        return options, self._capacity, keys, values, pack_hashes(hashes)
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Method rebuilds hash map from the output of __getstate__.  The bucket array is allocated once at the saved capacity and
+        nodes are linked straight into their buckets with their saved hashes, so nothing is rehashed, searched or resized.
+        Keys are only rehashed when the hash function isn't known to give the same hashes in every process, see
+        include.hash_function_is_stable: hash_function_builtin string hashes change with PYTHONHASHSEED.
+        """
+        # Initialize options on a minimal table, then build buckets of saved capacity.  Loop entries backwards, so inserting at
+        # the front of each chain restores its order.
+        options, capacity, keys, values, hashes = state
+        self.__init__(1, *options)
+        hashes = unpack_hashes(hashes)
+
+        # Statement, check if saved hashes may differ from what the hash function gives in this process, if so, rehash keys.
+        if not hash_function_is_stable(options[0]):
+            hashes = [self._hash_function(key) for key in keys]
+        buckets = [LinkedList() for _ in range(capacity)]
+        for i in range(len(keys) - 1, -1, -1):
+            hash = hashes[i]
+            buckets[hash % capacity].insert(keys[i], values[i], hash)
+
+        # Sort chains that are too long, and update buckets, capacity and size.
+        _treeify_chains(buckets, self._treeify_threshold)
+        self._buckets = DynamicArray(buckets)
+        self._capacity = capacity
+        self._size = len(keys)
+
+    def __reduce_ex__(self, protocol: int) -> tuple:
+        """
+        Method makes pickle and copy store hash map through __getstate__.  Under protocol 5 the hash array goes out of band
+        as a PickleBuffer, so a buffer_callback can ship it without copying it into the pickle stream.
+        """
+        state = self.__getstate__()
+        if protocol >= 5 and isinstance(state[-1], tuple):
+            typecode, hashes = state[-1]
+            state = state[:-1] + ((typecode, PickleBuffer(hashes)),)
+        return copyreg.__newobj__, (type(self),), state
+
+    def _nodes(self):
+        """
+        Method is a generator yielding every node of hash map, walking buckets lazily in place.  Raises RuntimeError if hash map
+        has an entry added or removed, or is resized, while the generator is running.
+        """
+        # Finish any incremental resize.  Initialize version seen at start.  Loop buckets and their nodes, check version before
+        # every node and once more at the end so a change after the last node is reported too.
+        self._finish_migration()
+        version = self._version
+        buckets = self._buckets
+        for i in range(self._capacity):
+            for node in buckets.get_at_index(i):
+                if self._version != version:
+                    raise RuntimeError("hash map changed during iteration")
+                yield node
+        if self._version != version:
+            raise RuntimeError("hash map changed during iteration")
+
+    def keys(self):
+        """
+        Method returns a generator over keys of hash map.  Nothing is copied, see _nodes.
+        """
+        return (node.key for node in self._nodes())
+
+    def values(self):
+        """
+        Method returns a generator over values of hash map.  Nothing is copied, see _nodes.
+        """
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        """
+        Method returns a generator over (key, value) tuples of hash map, in the same order get_keys_and_values uses.  Only the
+        tuple being yielded is allocated, see _nodes.
+        """
+        return ((node.key, node.value) for node in self._nodes())
+
+    def __iter__(self) -> "HashMapIterator":
+        """
+        Method enables hash map to iterate across itself, yielding every node.  Every loop gets its own iterator, so loops can
+        be nested or interleaved.
+        """
+        return HashMapIterator(self)
+
+
+class HashMapIterator:
+    """
+    Separate iterator class for HashMap
+    Walks buckets in order and the chain of each bucket in turn,
+    keeping its own cursor so several loops over one map don't interfere.
+    """
+
+    def __init__(self, map: HashMap) -> None:
+        """Initialize the iterator at the first bucket of map, finishing any incremental resize first."""
+        map._finish_migration()
+        self._map = map
+        self._buckets = map._buckets
+        self._index = 0
+        self._chain = iter(())
+        self._version = map._version
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> SLNode:
+        """
+        Obtain next node and advance iterator.
+        Raises RuntimeError if the map had an entry added or removed, or was resized, since the iterator was created.
+        """
+        if self._map._version != self._version:
+            raise RuntimeError("hash map changed during iteration")
+
+        # Loop until current chain yields a node.  Statement, check if chain is used up, if so, move to next bucket's chain or
+        # stop when there are no buckets left.
+        while True:
+            node = next(self._chain, None)
+            if node is not None:
+                return node
+            if self._index >= self._buckets.length():
+                raise StopIteration
+            self._chain = iter(self._buckets.get_at_index(self._index))
+            self._index += 1
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
@@ -218,28 +939,18 @@ def find_mode(da: DynamicArray) -> (DynamicArray, int):
     only contain that value.  Assume that input array contains at least one element and that all values stored in array will be
     strings.  No checks needed.  It's implemented with O(N) time complexity.
     """
-    # Initialize array and frequency counter.  Statement, check if array has the key.  If so, update value in map.  If not, insert.
+    # Initialize map, frequency and mode.  Loop array, count each key with a single lookup.  Statement, check if count passes
+    # highest frequency, if so, start a new mode.  Statement, check if count equals highest frequency, if so, append key to mode.
+    # Each key reaches a given count once, so mode never holds duplicates and no copy of the map is scanned afterwards.
     map = HashMap()
     frequency = 0
+    mode = DynamicArray()
     for i in range(da.length()):
         key = da.get_at_index(i)
-        if map.contains_key(key):
-            map.put(key, map.get(key) + 1)
-        else:
-            map.put(key, 1)
-
-    # Initialize keys and values.  Statement, check each key/value pair.  If valuee is greater than frequency, then update frequency.
-    keysValues = map.get_keys_and_values()
-    for i in range(keysValues.length()):
-        key, value = keysValues.get_at_index(i)
-        if value > frequency:
-            frequency = value
-
-    # Initialize mode.  Statement, check if value is equal to frequency.  If so, append and return mode and frequency.
-    mode = DynamicArray()
-    for i in range(keysValues.length()):
-        key, value = keysValues.get_at_index(i)
-        if value == frequency:
+        count = map.increment(key)
+        if count > frequency:
+            frequency, mode = count, DynamicArray()
+        if count == frequency:
             mode.append(key)
     return mode, frequency
 
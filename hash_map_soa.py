@@ -0,0 +1,499 @@
+# Implements a hash map using open addressing, with slots stored as parallel arrays.
+
+from array import array
+
+from include import (DynamicArray, HashEntry, MASK_64, hash_function_1, hash_function_2, is_prime,
+                        next_prime)
+
+
+# Slot states kept in the state bytearray.
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, tombstone_limit: float = 0.25) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+        Hashes, keys, values and slot states live in separate flat arrays,
+        so probing only reads the state bytearray and hash array until a hash matches.
+        The table is rebuilt in place once tombstones fill tombstone_limit of it.
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+
+        # removed entries still occupying a slot
+        self._tombstones = 0
+        self._tombstone_limit = tombstone_limit
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry(i)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest odd prime number
+        Uses the precomputed prime table in include, falling back to Miller-Rabin past it
+        """
+        return next_prime(max(capacity, 3))
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Method replaces slot arrays with empty ones of given capacity.
+        """
+        self._states = bytearray(capacity)
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+    def _entry(self, index: int) -> HashEntry:
+        """
+        Method returns slot at index as a HashEntry, or None if slot is empty.  Tombstones come back with is_tombstone set
+        and no key or value.
+        """
+        if self._states[index] == EMPTY:
+            return None
+        entry = HashEntry(self._keys[index], self._values[index], self._hashes[index])
+        entry.is_tombstone = self._states[index] == TOMBSTONE
+        return entry
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Method returns index of live slot holding key, or -1 if key isn't in hash map.
+        """
+        # Initialize arrays, index and i^2'th slot in the i'th iteration.
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        i = 0
+
+        # Loop until every slot quadratic probing can reach has been seen.  Statement, check for empty slot, if so, stop.
+        # Statement, check if slot is live and hash matches before comparing keys.  If key not found, update i^2'th slot.
+        while i <= capacity // 2:
+            state = states[index]
+            if state == EMPTY:
+                return -1
+            if state == LIVE and hashes[index] == hash and keys[index] == key:
+                return index
+            i = i + 1
+            index = (hash + i * i) % capacity
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Method updates key/value pair in hash map.  If given key already exists in hash map, associated value is replaced with new
+        value.  If given key is not in hash map, new key/value pair is added.  The table is also resized to double its current
+        capacity when the current load factor of table is greater than or equal to 0.5.
+        """
+        # Statement, check if the load factor is greater than or equal to 0.5, if so, resize to double its current capacity.
+        # Statement, check if live entries and tombstones together fill half the table, if so, rebuild it in place.
+        if self.table_load() >= 0.5:
+            self.resize_table(2 * self._capacity)
+        elif (self._size + self._tombstones) / self._capacity >= 0.5:
+            self._rehash(self._capacity)
+
+        # Initialize arrays, hash, index, i^2'th slot in the i'th iteration and first tombstone seen.
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        hash = self._hash_function(key) & MASK_64
+        index = hash % capacity
+        i = 0
+        tombstone = -1
+
+        # Loop until every slot quadratic probing can reach has been seen.  Statement, check for empty slot, if so, stop.
+        # Statement, check if live slot matches key, if so, replace value and return.  Remember first tombstone.
+        while i <= capacity // 2:
+            state = states[index]
+            if state == EMPTY:
+                break
+            if state == LIVE:
+                if hashes[index] == hash and keys[index] == key:
+                    self._values[index] = value
+                    return
+            elif tombstone < 0:
+                tombstone = index
+            i = i + 1
+            index = (hash + i * i) % capacity
+        else:
+            # Every reachable slot is taken.  Statement, check if a tombstone was seen, if not, grow table and try again.
+            if tombstone < 0:
+                self.resize_table(2 * self._capacity)
+                self.put(key, value)
+                return
+
+        # Statement, check if a tombstone was seen, if so, reuse its slot.  Fill slot and increment size.
+        if tombstone >= 0:
+            index = tombstone
+            self._tombstones -= 1
+        states[index] = LIVE
+        hashes[index] = hash
+        keys[index] = key
+        self._values[index] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Method returns current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Method returns number of empty buckets in hash table.  Slots held by tombstones aren't empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def tombstone_buckets(self) -> int:
+        """
+        Method returns number of buckets holding a tombstone, i.e. a removed entry whose slot hasn't been reclaimed yet.
+        """
+        return self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method changes capacity of internal hash table.  All existing key/value pairs remain in new hash map and all hash table
+        links are rehashed.  First, check that new_capacity is not less than size, if so, method does nothing.  If new_capacity
+        is valid, check that it's a prime number.  If not, change it to next highest prime number.
+        """
+        # Statement, check if capacity is less than size, if so, do nothing.
+        if new_capacity < self._size:
+            return
+
+        # Statement, check if capacity is a prime number, if not, change it to next highest prime number.
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # Loop while the entries would push the new table past the 0.5 load factor put enforces, double capacity as put would.
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity *= 2
+            if not self._is_prime(new_capacity):
+                new_capacity = self._next_prime(new_capacity)
+
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Method moves every live slot into new arrays of new_capacity using its stored hash.  Tombstones are dropped.
+        """
+        # Initialize old arrays and allocate new ones.
+        states, hashes, keys, values = self._states, self._hashes, self._keys, self._values
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+        new_states, new_hashes, new_keys, new_values = self._states, self._hashes, self._keys, self._values
+
+        # Loop old slots, skip empty slots and tombstones.  Probe new arrays quadratically for an empty slot and fill it.
+        for index in range(len(states)):
+            if states[index] == LIVE:
+                hash = hashes[index]
+                slot = hash % new_capacity
+                j = 0
+                while new_states[slot] != EMPTY:
+                    j = j + 1
+                    slot = (hash + j * j) % new_capacity
+                new_states[slot] = LIVE
+                new_hashes[slot] = hash
+                new_keys[slot] = keys[index]
+                new_values[slot] = values[index]
+
+    def get(self, key: str) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns None.
+        """
+        index = self._find(key, self._hash_function(key) & MASK_64)
+        return self._values[index] if index >= 0 else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method returns True if given key is in hash map, otherwise returns False.  An empty hash doesn't contain any keys.
+        """
+        return self._find(key, self._hash_function(key) & MASK_64) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Method removes given key and its associated value from hash map.  If key isn't in hash map, method does nothing.
+        """
+        # Initialize index.  Statement, check if key exists.  If so, turn slot into a tombstone, release key and value, decrement
+        # size and count tombstone.
+        index = self._find(key, self._hash_function(key) & MASK_64)
+        if index < 0:
+            return
+        self._states[index] = TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+        # Statement, check if tombstones have reached their limit, if so, rebuild table in place to reclaim their slots.
+        if self._tombstones >= self._tombstone_limit * self._capacity:
+            self._rehash(self._capacity)
+
+    def clear(self) -> None:
+        """
+        Method clears contents of hash map.  It doesn't change underlying hash table capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
+        array do not matter.
+        """
+        # Initialize new array.  Loop slots, check if slot is live, if so, then add to new array as tuple.  Return new array.
+        NewArray = DynamicArray()
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                NewArray.append((self._keys[index], self._values[index]))
+        return NewArray
+
+    def __iter__(self):
+        """
+        Method enables hash map to iterate across itself.  Yields a HashEntry for every live slot.
+        """
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                yield self._entry(index)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - put example 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - put example 2")
+    print("-------------------")
+    m = HashMap(41, hash_function_2)
+    for i in range(50):
+        m.put('str' + str(i // 3), i * 100)
+        if i % 10 == 9:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - table_load example 1")
+    print("--------------------------")
+    m = HashMap(101, hash_function_1)
+    print(round(m.table_load(), 2))
+    m.put('key1', 10)
+    print(round(m.table_load(), 2))
+    m.put('key2', 20)
+    print(round(m.table_load(), 2))
+    m.put('key1', 30)
+    print(round(m.table_load(), 2))
+
+    print("\nPDF - table_load example 2")
+    print("--------------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(50):
+        m.put('key' + str(i), i * 100)
+        if i % 10 == 0:
+            print(round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nPDF - empty_buckets example 1")
+    print("-----------------------------")
+    m = HashMap(101, hash_function_1)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key2', 20)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key1', 30)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+    m.put('key4', 40)
+    print(m.empty_buckets(), m.get_size(), m.get_capacity())
+
+    print("\nPDF - empty_buckets example 2")
+    print("-----------------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('key' + str(i), i * 100)
+        if i % 30 == 0:
+            print(m.empty_buckets(), m.get_size(), m.get_capacity())
+
+    print("\nPDF - resize example 1")
+    print("----------------------")
+    m = HashMap(23, hash_function_1)
+    m.put('key1', 10)
+    print(m.get_size(), m.get_capacity(), m.get('key1'), m.contains_key('key1'))
+    m.resize_table(30)
+    print(m.get_size(), m.get_capacity(), m.get('key1'), m.contains_key('key1'))
+
+    print("\nPDF - resize example 2")
+    print("----------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+
+        if m.table_load() > 0.5:
+            print(f"Check that the load factor is acceptable after the call to resize_table().\n"
+                  f"Your load factor is {round(m.table_load(), 2)} and should be less than or equal to 0.5")
+
+        m.put('some key', 'some value')
+        result = m.contains_key('some key')
+        m.remove('some key')
+
+        for key in keys:
+            # all inserted keys must be present
+            result &= m.contains_key(str(key))
+            # NOT inserted keys must be absent
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nPDF - get example 1")
+    print("-------------------")
+    m = HashMap(31, hash_function_1)
+    print(m.get('key'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+
+    print("\nPDF - get example 2")
+    print("-------------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nPDF - contains_key example 1")
+    print("----------------------------")
+    m = HashMap(11, hash_function_1)
+    print(m.contains_key('key1'))
+    m.put('key1', 10)
+    m.put('key2', 20)
+    m.put('key3', 30)
+    print(m.contains_key('key1'))
+    print(m.contains_key('key4'))
+    print(m.contains_key('key2'))
+    print(m.contains_key('key3'))
+    m.remove('key3')
+    print(m.contains_key('key3'))
+
+    print("\nPDF - contains_key example 2")
+    print("----------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+    result = True
+    for key in keys:
+        # all inserted keys must be present
+        result &= m.contains_key(str(key))
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result)
+
+    print("\nPDF - remove example 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get('key1'))
+    m.put('key1', 10)
+    print(m.get('key1'))
+    m.remove('key1')
+    print(m.get('key1'))
+    m.remove('key4')
+
+    print("\nPDF - clear example 1")
+    print("---------------------")
+    m = HashMap(101, hash_function_1)
+    print(m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    m.put('key2', 20)
+    m.put('key1', 30)
+    print(m.get_size(), m.get_capacity())
+    m.clear()
+    print(m.get_size(), m.get_capacity())
+
+    print("\nPDF - clear example 2")
+    print("---------------------")
+    m = HashMap(53, hash_function_1)
+    print(m.get_size(), m.get_capacity())
+    m.put('key1', 10)
+    print(m.get_size(), m.get_capacity())
+    m.put('key2', 20)
+    print(m.get_size(), m.get_capacity())
+    m.resize_table(100)
+    print(m.get_size(), m.get_capacity())
+    m.clear()
+    print(m.get_size(), m.get_capacity())
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.resize_table(2)
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(12)
+    print(m.get_keys_and_values())
+
+    print("\nPDF - __iter__(), __next__() example 1")
+    print("---------------------")
+    m = HashMap(10, hash_function_1)
+    for i in range(5):
+        m.put(str(i), str(i * 10))
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
+
+    print("\nPDF - __iter__(), __next__() example 2")
+    print("---------------------")
+    m = HashMap(10, hash_function_2)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    print(m)
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
@@ -1,218 +1,606 @@
-# Provided data structures necessary.
-
-
-# -------------- Used by both HashMaps (SC & OA)  -------------- #
-
-class DynamicArrayException(Exception):
-    pass
-
-
-class DynamicArray:
-    """
-    Class implementing a Dynamic Array
-    Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
-    """
-
-    def __init__(self, arr=None) -> None:
-        """Initialize new dynamic array using a list."""
-        self._data = arr.copy() if arr else []
-
-    def __iter__(self):
-        """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
-
-        da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
-        """
-        return None
-
-    def __str__(self) -> str:
-        """Override string method to provide more readable output."""
-        return str(self._data)
-
-    def append(self, value: object) -> None:
-        """Add new element at the end of the array."""
-        self._data.append(value)
-
-    def pop(self):
-        """Remove element from end of the array and return it."""
-        return self._data.pop()
-
-    def swap(self, i: int, j: int) -> None:
-        """Swap two elements in array given their indices."""
-        self._data[i], self._data[j] = self._data[j], self._data[i]
-
-    def get_at_index(self, index: int):
-        """Return value of element at a given index."""
-        if index < 0 or index >= self.length():
-            raise DynamicArrayException
-        return self._data[index]
-
-    def __getitem__(self, index: int):
-        """Return value of element at a given index using [] syntax."""
-        return self.get_at_index(index)
-
-    def set_at_index(self, index: int, value: object) -> None:
-        """Set value of element at a given index."""
-        if index < 0 or index >= self.length():
-            raise DynamicArrayException
-        self._data[index] = value
-
-    def __setitem__(self, index: int, value: object) -> None:
-        """Set value of element at a given index using [] syntax."""
-        self.set_at_index(index, value)
-
-    def length(self) -> int:
-        """Return length of array."""
-        return len(self._data)
-
-
-def hash_function_1(key: str) -> int:
-    """Sample Hash function #1 to be used with HashMap implementation"""
-    hash = 0
-    for letter in key:
-        hash += ord(letter)
-    return hash
-
-
-def hash_function_2(key: str) -> int:
-    """Sample Hash function #2 to be used with HashMap implementation"""
-    hash, index = 0, 0
-    index = 0
-    for letter in key:
-        hash += (index + 1) * ord(letter)
-        index += 1
-    return hash
-
-
-# --------- For use in Separate Chaining (SC) HashMap  --------- #
-
-class SLNode:
-    """
-    Singly Linked List node for use in a hash map
-    """
-
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
-        self.key = key
-        self.value = value
-        self.next = next
-
-    def __str__(self) -> str:
-        """Override string method to provide more readable output."""
-        return '(' + str(self.key) + ': ' + str(self.value) + ')'
-
-
-class LinkedListIterator:
-    """
-    Separate iterator class for LinkedList
-    """
-
-    def __init__(self, current_node: SLNode) -> None:
-        """Initialize the iterator with a node."""
-        self._node = current_node
-
-    def __iter__(self) -> "LinkedListIterator":
-        """Return the iterator."""
-        return self
-
-    def __next__(self) -> SLNode:
-        """Obtain next node and advance iterator."""
-
-        if not self._node:
-            raise StopIteration
-
-        current_node = self._node
-        self._node = self._node.next
-        return current_node
-
-
-class LinkedList:
-    """
-    Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
-    """
-
-    def __init__(self) -> None:
-        """
-        Initialize new linked list;
-        doesn't use a sentinel and keeps track of its size in a variable.
-        """
-        self._head = None
-        self._size = 0
-
-    def __str__(self) -> str:
-        """Override string method to provide more readable output."""
-        if not self._head:
-            return "SLL []"
-
-        content = str(self._head)
-        node = self._head.next
-        while node:
-            content += ' -> ' + str(node)
-            node = node.next
-        return 'SLL [' + content + ']'
-
-    def __iter__(self) -> LinkedListIterator:
-        """Return an iterator for the list, starting at the head."""
-        return LinkedListIterator(self._head)
-
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
-        self._size += 1
-
-    def remove(self, key: str) -> bool:
-        """
-        Remove first node with matching key.
-        Return True if removal was successful, False otherwise.
-        """
-        previous, node = None, self._head
-        while node:
-
-            if node.key == key:
-                if previous:
-                    previous.next = node.next
-                else:
-                    self._head = node.next
-                self._size -= 1
-                return True
-
-            previous, node = node, node.next
-        return False
-
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
-        node = self._head
-        while node:
-            if node.key == key:
-                return node
-            node = node.next
-        return node
-
-    def length(self) -> int:
-        """Return the length of the list."""
-        return self._size
-
-
-# ---------- For use in Open Addressing (OA) HashMap  ---------- #
-
-class HashEntry:
-
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
-        self.key = key
-        self.value = value
-
-        # Set this value to True when you "delete" a HashEntry
-        self.is_tombstone = False
-
-    def __str__(self) -> str:
-        """Override string method to provide more readable output."""
-        return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+# Provided data structures necessary.
+
+import secrets
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from itertools import chain
+
+# -------------- Used by both HashMaps (SC & OA)  -------------- #
+
+class DynamicArrayException(Exception):
+    pass
+
+
+class DynamicArray:
+    """
+    Class implementing a Dynamic Array
+    Supported methods are:
+    append, pop, swap, get_at_index, set_at_index, length
+    """
+
+    def __init__(self, arr=None) -> None:
+        """Initialize new dynamic array using a list."""
+        self._data = arr.copy() if arr else []
+
+    def __iter__(self):
+        """
+        Disable iterator capability for DynamicArray class
+        This means loops and aggregate functions like
+        those shown below won't work:
+
+        da = DynamicArray()
+        for value in da:        # will not work
+        min(da)                 # will not work
+        max(da)                 # will not work
+        sort(da)                # will not work
+        """
+        return None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return str(self._data)
+
+    def append(self, value: object) -> None:
+        """Add new element at the end of the array."""
+        self._data.append(value)
+
+    def pop(self):
+        """Remove element from end of the array and return it."""
+        return self._data.pop()
+
+    def swap(self, i: int, j: int) -> None:
+        """Swap two elements in array given their indices."""
+        self._data[i], self._data[j] = self._data[j], self._data[i]
+
+    def get_at_index(self, index: int):
+        """Return value of element at a given index."""
+        if index < 0 or index >= self.length():
+            raise DynamicArrayException
+        return self._data[index]
+
+    def __getitem__(self, index: int):
+        """Return value of element at a given index using [] syntax."""
+        return self.get_at_index(index)
+
+    def set_at_index(self, index: int, value: object) -> None:
+        """Set value of element at a given index."""
+        if index < 0 or index >= self.length():
+            raise DynamicArrayException
+        self._data[index] = value
+
+    def __setitem__(self, index: int, value: object) -> None:
+        """Set value of element at a given index using [] syntax."""
+        self.set_at_index(index, value)
+
+    def length(self) -> int:
+        """Return length of array."""
+        return len(self._data)
+
+
+def hash_function_1(key: str) -> int:
+    """Sample Hash function #1 to be used with HashMap implementation"""
+    hash = 0
+    for letter in key:
+        hash += ord(letter)
+    return hash
+
+
+def hash_function_2(key: str) -> int:
+    """Sample Hash function #2 to be used with HashMap implementation"""
+    hash, index = 0, 0
+    index = 0
+    for letter in key:
+        hash += (index + 1) * ord(letter)
+        index += 1
+    return hash
+
+
+# Mask folding a hash to a non-negative 64 bit integer.
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+# Constants for the 64 bit hashes below (primes taken from xxHash64).
+_PRIME_64_2 = 0xC2B2AE3D27D4EB4F
+_PRIME_64_3 = 0x165667B19E3779F9
+_MERSENNE_61 = (1 << 61) - 1
+
+# A seeded fold64 modulus has its top bit set, so it's a full 64 bit number, and its bottom bit, so it's odd.
+_SEED_MODULUS_BITS = (1 << 63) | 1
+
+
+def mix64(value: int) -> int:
+    """Scramble the bits of a 64 bit integer so nearby inputs land far apart (xxHash64 avalanche)"""
+    value &= MASK_64
+    value ^= value >> 33
+    value = (value * _PRIME_64_2) & MASK_64
+    value ^= value >> 29
+    value = (value * _PRIME_64_3) & MASK_64
+    value ^= value >> 32
+    return value
+
+
+def hash_function_fold64(key: str, seed: int = 0) -> int:
+    """
+    Seeded 64 bit hash of the UTF-8 bytes of key.
+    The bytes and a terminating 1 byte are read as one integer and folded in C modulo the
+    Mersenne prime 2^61 - 1, or modulo a 64 bit odd number drawn from a non-zero seed, then
+    scrambled with mix64.  The terminator keeps keys that differ only in trailing zero bytes
+    apart.  It costs about the same on long keys as on short ones, and anagrams or keys
+    differing in one position don't collide.  Keys collide when their integers differ by a
+    multiple of the modulus, so under seed 0 colliding keys are easy to build, while under
+    a secret seed they can't be found without it.  Use functools.partial(hash_function_fold64,
+    seed=...) to hand a seeded version to a HashMap, or SeededHash for a keyed hash.
+    """
+    modulus = mix64(seed) | _SEED_MODULUS_BITS if seed else _MERSENNE_61
+    return mix64((int.from_bytes(key.encode() + b'\x01', 'little') % modulus) ^ seed)
+
+
+def hash_function_builtin(key: object) -> int:
+    """
+    Wrapper over Python's built-in hash(), folded to a non-negative 64 bit integer.
+    Fastest option, but string hashes change between interpreter runs (PYTHONHASHSEED).
+    """
+    return hash(key) & MASK_64
+
+
+def hash_function_int(key: int) -> int:
+    """Hash for integer keys: the integer run through mix64 so sequential ids spread over the table"""
+    return mix64(key)
+
+
+# Stable ids of hash functions whose results are the same in every process, for binary formats that store which one was used.
+# hash_function_builtin is left out on purpose: string hashes change with PYTHONHASHSEED.
+HASH_FUNCTION_IDS = {hash_function_1: 1, hash_function_2: 2, hash_function_fold64: 3, hash_function_int: 4}
+
+# Id of SeededHash, whose instances are told apart by their seed, which binary formats store alongside the id.
+SEEDED_HASH_ID = 5
+
+# Hash functions whose string hashes change between interpreter runs (PYTHONHASHSEED), so hashes they gave can't be stored.
+PROCESS_LOCAL_HASH_FUNCTIONS = (hash_function_builtin, hash)
+
+
+def hash_function_is_stable(function: callable) -> bool:
+    """
+    Return True if function is known to give the same hashes in every process, so hashes it gave can be stored and reused:
+    a function registered in HASH_FUNCTION_IDS, or a SeededHash, which is stored with its seed
+    """
+    return function in HASH_FUNCTION_IDS or isinstance(function, SeededHash)
+
+
+def hash_function_from_id(function_id: int) -> callable:
+    """Return the hash function registered under function_id in HASH_FUNCTION_IDS, or None if there is none"""
+    for function, registered in HASH_FUNCTION_IDS.items():
+        if registered == function_id:
+            return function
+    return None
+
+
+def pack_hashes(hashes: list) -> object:
+    """
+    Return cached hashes as a (typecode, array) tuple of 64 bit integers, signed or unsigned, for pickling as one flat buffer.
+    If some hashes don't fit 64 bits, the list itself is returned.
+    """
+    for typecode in ('q', 'Q'):
+        try:
+            return typecode, array(typecode, hashes)
+        except OverflowError:
+            pass
+    return hashes
+
+
+def unpack_hashes(hashes: object) -> object:
+    """Return the sequence of hashes pack_hashes packed, its array given as an array or any bytes-like buffer"""
+    if not isinstance(hashes, tuple):
+        return hashes
+    typecode, buffer = hashes
+    if isinstance(buffer, array):
+        return buffer
+    packed = array(typecode)
+    packed.frombytes(memoryview(buffer).cast('B'))
+    return packed
+
+
+class MixedHash:
+    """
+    Hash function wrapper that runs the result of another hash function through mix64.
+    Used by power of two tables, which index with the low bits of the hash only.
+    """
+
+    __slots__ = ('function',)
+
+    def __init__(self, function) -> None:
+        """Initialize the wrapper with the hash function to mix."""
+        self.function = function
+
+    def __call__(self, key: object) -> int:
+        """Return mixed hash of key."""
+        return mix64(self.function(key))
+
+
+class SeededHash:
+    """
+    Keyed hash function with its own random seed, for maps holding keys an attacker picks.
+    Keys are hashed with BLAKE2b keyed by the seed and cut to 64 bits, a pseudorandom function
+    like SipHash: without the seed, colliding keys can't be found any faster than by guessing.
+    Give every map its own instance, e.g. HashMap(11, SeededHash()).  Keys must be strings.
+    """
+
+    __slots__ = ('seed', '_key')
+
+    def __init__(self, seed: int = None) -> None:
+        """Initialize the function with a 128 bit seed, drawn from the OS random source when not given."""
+        self.seed = secrets.randbits(128) if seed is None else seed
+        self._key = self.seed.to_bytes(16, 'little')
+
+    def __call__(self, key: str) -> int:
+        """Return keyed hash of key."""
+        return int.from_bytes(blake2b(key.encode(), digest_size=8, key=self._key).digest(), 'little')
+
+    def __reduce__(self) -> tuple:
+        """Pickle the function as its seed."""
+        return SeededHash, (self.seed,)
+
+
+class HashMapStats:
+    """
+    Operation statistics of a hash map with stats enabled
+    Each keyed operation is counted under its op name and has its lookup length recorded:
+    the nodes its chain walk compares (SC) or the slots its probe examines (OA), as counted
+    by the search the operation ran.  Rebuilds are counted and timed.  longest is kept by the
+    map: the longest chain (SC) or entry probe (OA) inserts made in its current table.
+    """
+
+    __slots__ = ('ops', 'lengths', 'max_length', 'resizes', 'resize_seconds', 'longest')
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.ops = {}
+        self.lengths = {}
+        self.max_length = 0
+        self.resizes = 0
+        self.resize_seconds = 0.0
+        self.longest = 0
+
+    def record(self, op: str, length: int) -> None:
+        """Count one op that walked length nodes or slots."""
+        self.ops[op] = self.ops.get(op, 0) + 1
+        self.lengths[length] = self.lengths.get(length, 0) + 1
+        if length > self.max_length:
+            self.max_length = length
+
+    def snapshot(self) -> dict:
+        """Return a copy of the counters as a dict, the lookup length histogram in increasing length order."""
+        return {'ops': dict(self.ops), 'lengths': dict(sorted(self.lengths.items())), 'max_length': self.max_length,
+                'resizes': self.resizes, 'resize_seconds': self.resize_seconds}
+
+
+# ---------------- Capacity helpers (SC & OA)  ----------------- #
+
+def _sieve(limit: int) -> list:
+    """Return every prime below limit, in increasing order (sieve of Eratosthenes)"""
+    flags = bytearray([1]) * limit
+    flags[0:2] = b'\x00\x00'
+    for number in range(2, int(limit ** 0.5) + 1):
+        if flags[number]:
+            flags[number * number::number] = bytes(len(range(number * number, limit, number)))
+    return [number for number in range(limit) if flags[number]]
+
+
+# Precomputed primes, looked up by bisect for every capacity they cover.
+PRIMES = _sieve(1 << 16)
+
+# Witnesses that make Miller-Rabin exact for every n below 3.3 * 10^24.
+_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+def is_prime(number: int) -> bool:
+    """
+    Return True if number is prime.
+    Small numbers are found in PRIMES by bisect, bigger ones go through deterministic Miller-Rabin.
+    """
+    if number <= PRIMES[-1]:
+        index = bisect_left(PRIMES, number)
+        return index < len(PRIMES) and PRIMES[index] == number
+
+    for witness in _WITNESSES:
+        if number % witness == 0:
+            return False
+
+    # Write number - 1 as d * 2^r with d odd, then check each witness.
+    d, r = number - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for witness in _WITNESSES:
+        x = pow(witness, d, number)
+        if x == 1 or x == number - 1:
+            continue
+        for _ in range(r - 1):
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(number: int) -> int:
+    """Return the smallest prime greater than or equal to number"""
+    if number <= PRIMES[-1]:
+        return PRIMES[bisect_left(PRIMES, number)]
+
+    number |= 1
+    while not is_prime(number):
+        number += 2
+    return number
+
+
+def next_power_of_two(number: int) -> int:
+    """Return the smallest power of two greater than or equal to number (and at least 1)"""
+    return 1 << max(number - 1, 0).bit_length()
+
+
+# --------- For use in Separate Chaining (SC) HashMap  --------- #
+
+class SLNode:
+    """
+    Singly Linked List node for use in a hash map
+    Uses __slots__ so a node carries no per-instance __dict__
+    """
+
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key, value and optionally the cached hash of the key."""
+        self.key = key
+        self.value = value
+        self.next = next
+        self.hash = hash
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return '(' + str(self.key) + ': ' + str(self.value) + ')'
+
+
+class LinkedListIterator:
+    """
+    Separate iterator class for LinkedList
+    """
+
+    def __init__(self, current_node: SLNode) -> None:
+        """Initialize the iterator with a node."""
+        self._node = current_node
+
+    def __iter__(self) -> "LinkedListIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> SLNode:
+        """Obtain next node and advance iterator."""
+
+        if not self._node:
+            raise StopIteration
+
+        current_node = self._node
+        self._node = self._node.next
+        return current_node
+
+
+class LinkedList:
+    """
+    Class implementing a Singly Linked List
+    Supported methods are: insert, insert_node, remove, pop, contains, length, iterator
+    """
+
+    __slots__ = ('_head', '_size')
+
+    def __init__(self) -> None:
+        """
+        Initialize new linked list;
+        doesn't use a sentinel and keeps track of its size in a variable.
+        """
+        self._head = None
+        self._size = 0
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        if not self._head:
+            return "SLL []"
+
+        content = str(self._head)
+        node = self._head.next
+        while node:
+            content += ' -> ' + str(node)
+            node = node.next
+        return 'SLL [' + content + ']'
+
+    def __iter__(self) -> LinkedListIterator:
+        """Return an iterator for the list, starting at the head."""
+        return LinkedListIterator(self._head)
+
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node at front of the list and return it."""
+        self._head = SLNode(key, value, self._head, hash)
+        self._size += 1
+        return self._head
+
+    def insert_node(self, node: SLNode) -> None:
+        """Relink an existing node at front of the list."""
+        node.next = self._head
+        self._head = node
+        self._size += 1
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove first node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        return self.pop(key) is not None
+
+    def pop(self, key: str) -> SLNode:
+        """
+        Unlink first node with matching key in a single pass.
+        Return the removed node, or None if no match.
+        """
+        previous, node = None, self._head
+        while node:
+
+            if node.key == key:
+                if previous:
+                    previous.next = node.next
+                else:
+                    self._head = node.next
+                self._size -= 1
+                return node
+
+            previous, node = node, node.next
+        return None
+
+    def contains(self, key: str) -> SLNode:
+        """Return node with matching key, or None if no match"""
+        node = self._head
+        while node:
+            if node.key == key:
+                return node
+            node = node.next
+        return node
+
+    def length(self) -> int:
+        """Return the length of the list."""
+        return self._size
+
+
+class SortedChain:
+    """
+    Class implementing a chain kept as arrays sorted by key, searched by binary search
+    A drop-in replacement for LinkedList once a chain gets long: string keys are held in
+    key order so contains and pop cost O(log n) comparisons, while keys of other types,
+    which may not compare with strings, are kept apart in insertion order and scanned.
+    Supported methods are: insert, insert_node, remove, pop, contains, search, length, iterator
+    """
+
+    __slots__ = ('_keys', '_nodes', '_others')
+
+    def __init__(self, nodes=()) -> None:
+        """Initialize new sorted chain holding the given nodes, e.g. those of a LinkedList."""
+        nodes = list(nodes)
+        self._nodes = sorted((node for node in nodes if isinstance(node.key, str)), key=lambda node: node.key)
+        self._keys = [node.key for node in self._nodes]
+        self._others = [node for node in nodes if not isinstance(node.key, str)]
+        for node in nodes:
+            node.next = None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SORTED [' + ', '.join(str(node) for node in self) + ']'
+
+    def __iter__(self):
+        """Return an iterator over the nodes, string keys in key order first."""
+        return chain(self._nodes, self._others)
+
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node in key order and return it."""
+        node = SLNode(key, value, None, hash)
+        self.insert_node(node)
+        return node
+
+    def insert_node(self, node: SLNode) -> None:
+        """Place an existing node in key order."""
+        node.next = None
+        if isinstance(node.key, str):
+            index = bisect_left(self._keys, node.key)
+            self._keys.insert(index, node.key)
+            self._nodes.insert(index, node)
+        else:
+            self._others.append(node)
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove node with matching key.
+        Return True if removal was successful, False otherwise.
+        """
+        return self.pop(key) is not None
+
+    def pop(self, key: str) -> SLNode:
+        """
+        Remove node with matching key.
+        Return the removed node, or None if no match.
+        """
+        if isinstance(key, str):
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+                return self._nodes.pop(index)
+            return None
+        for index, node in enumerate(self._others):
+            if node.key == key:
+                return self._others.pop(index)
+        return None
+
+    def contains(self, key: str) -> SLNode:
+        """Return node with matching key, or None if no match"""
+        if isinstance(key, str):
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                return self._nodes[index]
+            return None
+        for node in self._others:
+            if node.key == key:
+                return node
+        return None
+
+    def search(self, key: str) -> (SLNode, int):
+        """
+        Return a tuple of node with matching key, or None if no match, and the number of keys compared.  For a string key,
+        bisect_left's halving is replayed from the index it returned to count its comparisons, plus one for equality.
+        """
+        if isinstance(key, str):
+            keys = self._keys
+            index = bisect_left(keys, key)
+            compared, low, high = 0, 0, len(keys)
+            while low < high:
+                middle = (low + high) // 2
+                if middle < index:
+                    low = middle + 1
+                else:
+                    high = middle
+                compared += 1
+            if index < len(keys):
+                if keys[index] == key:
+                    return self._nodes[index], compared + 1
+                return None, compared + 1
+            return None, compared
+        for compared, node in enumerate(self._others, 1):
+            if node.key == key:
+                return node, compared
+        return None, len(self._others)
+
+    def length(self) -> int:
+        """Return the number of nodes."""
+        return len(self._nodes) + len(self._others)
+
+
+# ---------- For use in Open Addressing (OA) HashMap  ---------- #
+
+class HashEntry:
+    """
+    Entry for use in an open addressing hash map
+    Uses __slots__ so an entry carries no per-instance __dict__
+    """
+
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        The hash of the key is cached so probing and resizing don't recompute it.
+        """
+        self.key = key
+        self.value = value
+        self.hash = hash
+
+        # Set this value to True when you "delete" a HashEntry
+        self.is_tombstone = False
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
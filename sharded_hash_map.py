@@ -0,0 +1,323 @@
+# Implements a hash map that partitions keys across independent HashMap shards.
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from include import DynamicArray, hash_function_builtin, hash_function_is_stable, mix64
+import hash_map_sc
+
+
+class ShardedHashMap:
+    def __init__(self,
+                 shards: int = 4,
+                 map_class: type = hash_map_sc.HashMap,
+                 function: callable = hash_function_builtin,
+                 capacity: int = 11,
+                 max_workers: int = None,
+                 **options) -> None:
+        """
+        Initialize new ShardedHashMap of shards independent maps of map_class
+        (hash_map_sc.HashMap or hash_map_oa.HashMap), each built as map_class(capacity, function, **options)
+        A key goes to the shard picked by the high bits of mix64(function(key)), so routing
+        doesn't line up with the low bits each shard indexes its buckets with.  Every shard
+        resizes on its own, so a resize only stalls the keys of one shard.
+        Bulk operations run shard by shard on a ThreadPoolExecutor of max_workers threads.
+        """
+        self._shards = [map_class(capacity, function, **options) for _ in range(shards)]
+        self._function = function
+        self._max_workers = max_workers
+        self._executor = None
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i, shard in enumerate(self._shards):
+            out += 'shard ' + str(i) + ':\n' + str(shard)
+        return out
+
+    def _shard(self, key: object):
+        """
+        Method returns shard that holds key.
+        """
+        shards = self._shards
+        return shards[(mix64(self._function(key)) * len(shards)) >> 64]
+
+    def _partition(self, keys: list) -> list:
+        """
+        Method returns one list per shard of the positions in keys that route to it.
+        """
+        count = len(self._shards)
+        function = self._function
+        positions = [[] for _ in range(count)]
+        for position, key in enumerate(keys):
+            positions[(mix64(function(key)) * count) >> 64].append(position)
+        return positions
+
+    def _map(self, function: callable, tasks: list) -> list:
+        """
+        Method runs function(shard, task) for each shard and its task on the executor and returns results in shard order.
+        Shards are independent maps and each is given to a single thread, so they never share state.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._max_workers or len(self._shards))
+        return list(self._executor.map(function, self._shards, tasks))
+
+    def close(self) -> None:
+        """
+        Method shuts down the thread pool used by bulk operations.  It's started again if another bulk operation runs.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __getstate__(self) -> dict:
+        """
+        Method returns attributes of hash map for pickle and copy, without the thread pool, which is started again on demand.
+        """
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Method restores hash map from the output of __getstate__.  Routing hashes keys again, so when the hash function isn't
+        known to give the same hashes in every process (see include.hash_function_is_stable), entries are moved to the shard
+        their key routes to in this process.
+        """
+        self.__dict__.update(state)
+
+        # Statement, check if routing may differ from the process that saved hash map, if so, take entries out of every shard
+        # and put each back through routing.
+        if not hash_function_is_stable(self._function):
+            pairs = [(key, value) for shard in self._shards for key, value in shard.items()]
+            for shard in self._shards:
+                shard.clear()
+            for key, value in pairs:
+                self._shard(key).put(key, value)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(shard.get_size() for shard in self._shards)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, summed over shards
+        """
+        return sum(shard.get_capacity() for shard in self._shards)
+
+    def get_shard_count(self) -> int:
+        """
+        Return number of shards
+        """
+        return len(self._shards)
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: object, value: object) -> None:
+        """
+        Method updates key/value pair in the shard of key.  Only that shard resizes if it has to.
+        """
+        self._shard(key).put(key, value)
+
+    def get(self, key: object) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns None.
+        """
+        return self._shard(key).get(key)
+
+    def get_or_default(self, key: object, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns default.
+        """
+        return self._shard(key).get_or_default(key, default)
+
+    def contains_key(self, key: object) -> bool:
+        """
+        Method returns True if given key is in hash map, otherwise returns False.
+        """
+        return self._shard(key).contains_key(key)
+
+    def remove(self, key: object) -> None:
+        """
+        Method removes given key and its associated value from hash map.  If key isn't in hash map, method does nothing.
+        """
+        self._shard(key).remove(key)
+
+    def pop(self, key: object, default: object = None) -> object:
+        """
+        Method removes given key from hash map and returns its associated value, or default if key isn't in hash map.
+        """
+        return self._shard(key).pop(key, default)
+
+    def setdefault(self, key: object, default: object = None) -> object:
+        """
+        Method returns value associated with given key, putting default under key first if it isn't in hash map.
+        """
+        return self._shard(key).setdefault(key, default)
+
+    def increment(self, key: object, delta: int = 1) -> int:
+        """
+        Method adds delta to value associated with given key, starting from delta if it isn't in hash map, and returns new value.
+        """
+        return self._shard(key).increment(key, delta)
+
+    def update(self, key: object, function: callable, default: object = None) -> object:
+        """
+        Method replaces value associated with given key by function(value), or puts function(default) if it isn't in hash map.
+        """
+        return self._shard(key).update(key, function, default)
+
+    def upsert(self, key: object, value: object, combine: callable) -> object:
+        """
+        Method puts value under given key, or replaces its value by combine(old value, value) if it's in hash map already.
+        """
+        return self._shard(key).upsert(key, value, combine)
+
+    def table_load(self) -> float:
+        """
+        Method returns load factor over all shards.
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Method returns number of empty buckets over all shards.
+        """
+        return sum(shard.empty_buckets() for shard in self._shards)
+
+    def shard_stats(self) -> DynamicArray:
+        """
+        Method returns a dynamic array with a (size, capacity, load factor, empty buckets) tuple for each shard, in shard
+        order, to spot skew between shards.
+        """
+        return DynamicArray([(shard.get_size(), shard.get_capacity(), shard.table_load(), shard.empty_buckets())
+                             for shard in self._shards])
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Method resizes every shard to an equal share of new_capacity.
+        """
+        share = -(-new_capacity // len(self._shards))
+        for shard in self._shards:
+            shard.resize_table(share)
+
+    def reserve(self, count: int) -> None:
+        """
+        Method makes room for count entries in total, spread evenly over shards.
+        """
+        share = -(-count // len(self._shards))
+        for shard in self._shards:
+            shard.reserve(share)
+
+    def clear(self) -> None:
+        """
+        Method clears every shard.  It doesn't change underlying hash table capacities.
+        """
+        for shard in self._shards:
+            shard.clear()
+
+    def put_many(self, pairs) -> None:
+        """
+        Method puts every key/value pair of an iterable into hash map.  Pairs are split by shard and each shard runs its own
+        put_many on the thread pool.
+        """
+        pairs = list(pairs)
+        positions = self._partition([key for key, _ in pairs])
+        self._map(lambda shard, batch: shard.put_many(pairs[i] for i in batch), positions)
+
+    def _gather(self, keys, method: str) -> list:
+        """
+        Method runs the given bulk lookup method of each shard on its share of keys in parallel and returns the results in
+        the order of keys.
+        """
+        keys = list(keys)
+        positions = self._partition(keys)
+        results = [None] * len(keys)
+        found = self._map(lambda shard, batch: getattr(shard, method)(keys[i] for i in batch), positions)
+        for batch, values in zip(positions, found):
+            for j, position in enumerate(batch):
+                results[position] = values.get_at_index(j)
+        return results
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Method returns a dynamic array with the value of each key in keys, in the same order, or None where a key isn't in hash
+        map.  Shards are searched in parallel.
+        """
+        return DynamicArray(self._gather(keys, 'get_many'))
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Method returns a dynamic array with True or False for each key in keys, in the same order, telling if it's in hash map.
+        Shards are searched in parallel.
+        """
+        return DynamicArray(self._gather(keys, 'contains_many'))
+
+    def remove_many(self, keys) -> None:
+        """
+        Method removes every key in keys from hash map.  Keys that aren't in hash map are skipped.  Shards work in parallel.
+        """
+        keys = list(keys)
+        self._map(lambda shard, batch: shard.remove_many(keys[i] for i in batch), self._partition(keys))
+
+    def keys(self):
+        """
+        Method returns a generator over keys of every shard in turn.
+        """
+        return chain.from_iterable(shard.keys() for shard in self._shards)
+
+    def values(self):
+        """
+        Method returns a generator over values of every shard in turn.
+        """
+        return chain.from_iterable(shard.values() for shard in self._shards)
+
+    def items(self):
+        """
+        Method returns a generator over (key, value) tuples of every shard in turn.
+        """
+        return chain.from_iterable(shard.items() for shard in self._shards)
+
+    def __iter__(self):
+        """
+        Method enables hash map to iterate across itself, yielding the entries of every shard in turn.
+        """
+        return chain.from_iterable(self._shards)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
+        array do not matter.
+        """
+        return DynamicArray(list(self.items()))
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+
+    for map_class in (hash_map_sc.HashMap, hash_map_oa.HashMap):
+        print("\n" + map_class.__module__ + " shards - put, get, remove and bulk operations")
+        print("------------------------------------------------------------------")
+        m = ShardedHashMap(4, map_class)
+        for i in range(1000):
+            m.put('key' + str(i), i)
+        for i in range(0, 1000, 2):
+            m.remove('key' + str(i))
+        print(m.get_size(), m.get('key1'), m.get('key2'), m.contains_key('key3'), m.pop('key5'), m.get_size())
+
+        m.put_many(('bulk' + str(i), i) for i in range(2000))
+        values = m.get_many(['bulk7', 'missing', 'key9'])
+        print(m.get_size(), [values[i] for i in range(values.length())])
+        m.remove_many('bulk' + str(i) for i in range(1000))
+        print(m.get_size(), sorted(m.values())[:3], len(list(m.keys())), sum(1 for _ in m))
+
+        stats = m.shard_stats()
+        print([stats[i][0] for i in range(stats.length())], m.get_capacity(), round(m.table_load(), 2))
+        m.close()
@@ -0,0 +1,374 @@
+# Implements a read-only open addressing hash map laid out in one flat buffer, shareable between processes.
+
+import mmap
+import pickle
+import struct
+import sys
+import threading
+from array import array
+from multiprocessing import shared_memory
+
+from include import (DynamicArray, HASH_FUNCTION_IDS, HashEntry, PROCESS_LOCAL_HASH_FUNCTIONS, SEEDED_HASH_ID,
+                     SeededHash, hash_function_fold64, hash_function_from_id, next_prime)
+
+
+# Image layout, every field little-endian:
+#   header   magic, format version u16, hash function id u16 (0 if not registered), capacity u64, size u64, arena length u64,
+#            SeededHash seed u128 (0 for other functions)
+#   hashes   capacity u64 slot hashes
+#   offsets  capacity u64 arena offsets of slot records, EMPTY for an empty slot
+#   arena    one record per entry: key length u32, value length u32, UTF-8 key bytes, pickled value bytes
+MAGIC = b'HMAP'
+VERSION = 2
+EMPTY = 0xFFFFFFFFFFFFFFFF
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_HEADER = struct.Struct('<4sHHQQQ16s')
+_RECORD = struct.Struct('<II')
+
+# Held while registration with the resource tracker is switched off for an attach, and while creating a segment, so a
+# segment created by another thread of this module is never left unregistered.
+_REGISTER_LOCK = threading.Lock()
+
+
+def build_image(items, function: callable = hash_function_fold64) -> bytearray:
+    """
+    Return the binary image of a table holding every (key, value) pair of items, a map or an iterable of pairs.
+    Keys must be strings, values anything pickle can handle.  A key seen twice keeps its last value.  Slots are
+    placed with the quadratic probing hash_map_oa.HashMap uses, on a prime capacity kept under load factor 0.5.
+    function must give the same hashes in every process: hash_function_builtin is refused with ValueError.  A
+    SeededHash is stored with its seed, so readers get it back without being handed it.
+    """
+    # Statement, check if hashes of function change between processes, if so, raise.
+    if function in PROCESS_LOCAL_HASH_FUNCTIONS:
+        raise ValueError("hashes of " + function.__name__ + " change between processes, so they can't be stored")
+
+    # Initialize records of hash, key bytes and value bytes, and a capacity that keeps load factor under 0.5.
+    if hasattr(items, 'items'):
+        items = items.items()
+    records = [(function(key) & _MASK_64, key.encode(), pickle.dumps(value, protocol=5)) for key, value in items]
+    capacity = next_prime(2 * len(records) + 1)
+    hashes = array('Q', bytes(8 * capacity))
+    offsets = array('Q', [EMPTY]) * capacity
+    arena = bytearray()
+
+    # Loop records, append each to arena and probe for its slot.  Statement, check if slot holds the same key, if so, point it
+    # at the new record.  Otherwise, fill the empty slot found and count entry.
+    size = 0
+    for hash, key, value in records:
+        offset = len(arena)
+        arena += _RECORD.pack(len(key), len(value))
+        arena += key
+        arena += value
+        index, step = hash % capacity, 1
+        while offsets[index] != EMPTY:
+            if hashes[index] == hash and _record_key(arena, offsets[index]) == key:
+                break
+            index, step = (index + step) % capacity, step + 2
+        else:
+            size += 1
+        hashes[index] = hash
+        offsets[index] = offset
+
+    # Arrays are written in native order, swap them on big-endian machines so the image is always little-endian.
+    if sys.byteorder == 'big':
+        hashes.byteswap()
+        offsets.byteswap()
+    if isinstance(function, SeededHash):
+        function_id, seed = SEEDED_HASH_ID, function.seed.to_bytes(16, 'little')
+    else:
+        function_id, seed = HASH_FUNCTION_IDS.get(function, 0), bytes(16)
+    image = bytearray(_HEADER.pack(MAGIC, VERSION, function_id, capacity, size, len(arena), seed))
+    image += hashes.tobytes()
+    image += offsets.tobytes()
+    image += arena
+    return image
+
+
+def _record_key(arena, offset: int):
+    """Return the key bytes of the record at offset, as a slice of arena"""
+    length = _RECORD.unpack_from(arena, offset)[0]
+    start = offset + _RECORD.size
+    return arena[start:start + length]
+
+
+class FrozenHashMap:
+    def __init__(self, buffer, function: callable = None) -> None:
+        """
+        Initialize a read-only HashMap over an image written by build_image
+        The buffer (bytes, bytearray, mmap, shared memory...) is read in place: slot hashes and
+        offsets are memoryview casts of it and keys are compared against it, nothing is copied
+        or deserialized up front.  function defaults to the one the header names, a SeededHash
+        getting its stored seed back, and must be given for images built with an unregistered
+        hash function.
+        """
+        if sys.byteorder == 'big':
+            raise ValueError("hash map images are little-endian, this machine isn't")
+
+        # Initialize header fields.  Statement, check magic and version, if wrong, raise.
+        self._buffer = memoryview(buffer)
+        magic, version, function_id, capacity, size, arena_length, seed = _HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("buffer doesn't hold a version " + str(VERSION) + " hash map image")
+        if function is None:
+            if function_id == SEEDED_HASH_ID:
+                function = SeededHash(int.from_bytes(seed, 'little'))
+            else:
+                function = hash_function_from_id(function_id)
+            if function is None:
+                raise ValueError("image was built with an unregistered hash function, pass it as function")
+
+        self._hash_function = function
+        self._capacity = capacity
+        self._size = size
+
+        # Initialize views of slot arrays and arena.
+        start = _HEADER.size
+        self._hashes = self._buffer[start:start + 8 * capacity].cast('Q')
+        self._offsets = self._buffer[start + 8 * capacity:start + 16 * capacity].cast('Q')
+        self._arena = self._buffer[start + 16 * capacity:start + 16 * capacity + arena_length]
+
+    def release(self) -> None:
+        """
+        Method releases every view of the buffer, so the buffer can be closed or resized.  Hash map can't be used afterwards.
+        """
+        for view in (self._hashes, self._offsets, self._arena, self._buffer):
+            view.release()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def table_load(self) -> float:
+        """
+        Method returns current hash table load factor.
+        """
+        return self._size / self._capacity
+
+    def _find(self, key: str) -> int:
+        """
+        Method returns arena offset of the record holding key, or -1 if key isn't in hash map.
+        """
+        # Initialize hash, index and step to next slot.  Key is only encoded once a slot's hash matches.
+        hash = self._hash_function(key) & _MASK_64
+        hashes, offsets, arena = self._hashes, self._offsets, self._arena
+        capacity = self._capacity
+        index, step = hash % capacity, 1
+        encoded = None
+
+        # Loop until an empty slot.  Statement, check if hash matches, if so, compare key bytes in place and return offset.
+        for _ in range(capacity // 2 + 1):
+            offset = offsets[index]
+            if offset == EMPTY:
+                return -1
+            if hashes[index] == hash:
+                if encoded is None:
+                    encoded = key.encode()
+                if _record_key(arena, offset) == encoded:
+                    return offset
+            index, step = (index + step) % capacity, step + 2
+        return -1
+
+    def _value(self, offset: int) -> object:
+        """
+        Method returns value of the record at offset, unpickled from the arena.
+        """
+        key_length, value_length = _RECORD.unpack_from(self._arena, offset)
+        start = offset + _RECORD.size + key_length
+        return pickle.loads(self._arena[start:start + value_length])
+
+    def get(self, key: str) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns None.
+        """
+        return self.get_or_default(key)
+
+    def get_or_default(self, key: str, default: object = None) -> object:
+        """
+        Method returns value associated with given key.  If key isn't in hash map, method returns default.
+        """
+        offset = self._find(key)
+        return self._value(offset) if offset >= 0 else default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Method returns True if given key is in hash map, otherwise returns False.
+        """
+        return self._find(key) >= 0
+
+    def _records(self):
+        """
+        Method is a generator yielding (hash, arena offset) of every filled slot, in slot order.
+        """
+        hashes, offsets = self._hashes, self._offsets
+        for index in range(self._capacity):
+            if offsets[index] != EMPTY:
+                yield hashes[index], offsets[index]
+
+    def keys(self):
+        """
+        Method returns a generator over keys of hash map.
+        """
+        return (str(_record_key(self._arena, offset), 'utf-8') for _, offset in self._records())
+
+    def values(self):
+        """
+        Method returns a generator over values of hash map.
+        """
+        return (self._value(offset) for _, offset in self._records())
+
+    def items(self):
+        """
+        Method returns a generator over (key, value) tuples of hash map.
+        """
+        return ((str(_record_key(self._arena, offset), 'utf-8'), self._value(offset)) for _, offset in self._records())
+
+    def __iter__(self):
+        """
+        Method enables hash map to iterate across itself, yielding a HashEntry per entry like hash_map_oa.HashMap does.
+        """
+        return (HashEntry(str(_record_key(self._arena, offset), 'utf-8'), self._value(offset), hash)
+                for hash, offset in self._records())
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Method returns a dynamic array where each index contains a tuple of a key/value pair stored in hash map.  Order of keys in
+        array do not matter.
+        """
+        return DynamicArray(list(self.items()))
+
+
+class MappedHashMap(FrozenHashMap):
+    def __init__(self, path: str, function: callable = None) -> None:
+        """
+        Initialize a read-only HashMap over an image file written by hash_map_oa.HashMap.save
+        The file is memory-mapped, so opening it only reads the header: pages are faulted in
+        by the lookups that touch them and shared with every other process mapping the file.
+        """
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        super().__init__(self._mmap, function)
+
+    def close(self) -> None:
+        """
+        Method unmaps the file.  Hash map can't be used afterwards.
+        """
+        self.release()
+        self._mmap.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Return shared memory segment name, opened without registering it with this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the segment, and a tracker of its own would unlink it when this
+        # process exits.  Unregistering afterwards isn't safe either: worker processes share the creator's tracker and would
+        # drop the creator's registration.  So registration is skipped while attaching.  The switch is process-wide, so it's
+        # made under _REGISTER_LOCK, which create holds too: code creating segments through SharedMemory directly from
+        # another thread at the same moment isn't covered.
+        from multiprocessing import resource_tracker
+        with _REGISTER_LOCK:
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                return shared_memory.SharedMemory(name)
+            finally:
+                resource_tracker.register = register
+
+
+class SharedHashMap(FrozenHashMap):
+    def __init__(self, name: str, function: callable = None) -> None:
+        """
+        Attach to the shared memory segment name made by SharedHashMap.create
+        Lookups read the segment in place, so any number of processes share one copy of the
+        table and attaching costs the same whatever its size.
+        """
+        self._memory = _attach(name)
+        self._owner = False
+        super().__init__(self._memory.buf, function)
+
+    @classmethod
+    def create(cls, items, function: callable = hash_function_fold64, name: str = None) -> "SharedHashMap":
+        """
+        Build a table of items (a map such as hash_map_oa.HashMap, or an iterable of pairs) in a new shared memory segment and
+        return it attached.  function must give the same hash in every process, so hash_function_builtin doesn't qualify.  The
+        creator should unlink() the segment once every process is done with it.
+        """
+        image = build_image(items, function)
+        with _REGISTER_LOCK:
+            memory = shared_memory.SharedMemory(name, create=True, size=len(image))
+        memory.buf[:len(image)] = image
+
+        map = cls.__new__(cls)
+        map._memory = memory
+        map._owner = True
+        FrozenHashMap.__init__(map, memory.buf, function)
+        return map
+
+    def get_name(self) -> str:
+        """
+        Return name of the shared memory segment, for other processes to attach with
+        """
+        return self._memory.name
+
+    def close(self) -> None:
+        """
+        Method detaches this process from the segment.  The segment itself stays until the creator unlinks it.
+        """
+        self.release()
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Method destroys the segment once every process has closed it.  Only the creator should call it.
+        """
+        self._memory.unlink()
+
+
+def _lookup_worker(name: str, keys: list) -> list:
+    """Pool task of the basic testing below: attach the shared table, return the value of each key and detach."""
+    table = SharedHashMap(name)
+    values = [table.get(key) for key in keys]
+    table.close()
+    return values
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    from multiprocessing import Pool
+
+    import hash_map_oa
+
+    print("\nSharedHashMap - built from an OA map, read from worker processes")
+    print("----------------------------------------------------------------")
+    source = hash_map_oa.HashMap(11, hash_function_fold64)
+    for i in range(1000):
+        source.put('key' + str(i), {'id': i, 'name': 'name' + str(i)})
+    source.put('key3', 'replaced')
+    source.remove('key4')
+
+    table = SharedHashMap.create(source)
+    print(table.get_size(), table.get_capacity(), round(table.table_load(), 2))
+    print(table.get('key3'), table.get('key4'), table.get('key5'), table.contains_key('key999'), table.contains_key('x'))
+    with Pool(2) as pool:
+        results = pool.starmap(_lookup_worker, [(table.get_name(), ['key1', 'key3', 'nope']), (table.get_name(), ['key2'])])
+    print(results)
+    print(sorted(table.keys())[:3], sum(1 for _ in table), sum(1 for _ in table.values()))
+
+    frozen = FrozenHashMap(build_image([('a', 1), ('b', 2), ('a', 3)], hash_function_fold64))
+    print(frozen.get_size(), sorted(frozen.items()))
+    table.close()
+    table.unlink()